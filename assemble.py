@@ -0,0 +1,200 @@
+"""Concatenate the rendered segments into the final cut.
+
+The segments are taken, in order, from the ``segments.txt`` manifest that
+``render.py`` writes into the quality directory (or from ``--manifest``),
+falling back to one movie per scene in ``render.SCENES``. Their streams are
+checked for compatibility before they are joined with stream copy. The
+content hash of every segment is recorded next to the output, and nothing is
+done when no segment has changed since the last assembly.
+
+    python assemble.py [-q h] [-o final_cut.mp4] [--manifest FILE] [--force]
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from render import QUALITIES, SCENES, SEGMENT_LIST
+
+QUALITY_DIRS = {
+    "l": "480p15",
+    "m": "720p30",
+    "h": "1080p60",
+    "p": "1440p60",
+    "k": "2160p60",
+}
+VIDEO_KEYS = ["codec_name", "profile", "width", "height", "pix_fmt", "r_frame_rate"]
+AUDIO_KEYS = ["codec_name", "sample_rate", "channels"]
+
+
+class IncompatibleSegments(Exception):
+    pass
+
+
+def read_manifest(video_dir, manifest=None):
+    manifest = Path(manifest) if manifest else video_dir / SEGMENT_LIST
+    if manifest.exists():
+        names = manifest.read_text().split()
+        base = manifest.parent
+    else:
+        names = [f"{scene}.mp4" for scene in SCENES]
+        base = video_dir
+    segments = [(base / name).resolve() for name in names]
+    missing = [str(path) for path in segments if not path.exists()]
+    if missing:
+        raise FileNotFoundError("Missing segments: " + ", ".join(missing))
+    return segments
+
+
+def get_stream_parameters(path):
+    output = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_streams", "-of", "json", str(path)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    parameters = {}
+    for stream in json.loads(output)["streams"]:
+        kind = stream["codec_type"]
+        keys = {"video": VIDEO_KEYS, "audio": AUDIO_KEYS}.get(kind)
+        if keys is not None and kind not in parameters:
+            parameters[kind] = {key: stream.get(key) for key in keys}
+    return parameters
+
+
+def check_compatible(segments):
+    """Raise IncompatibleSegments unless all segments can be stream-copied."""
+    reference = get_stream_parameters(segments[0])
+    problems = []
+    for path in segments[1:]:
+        parameters = get_stream_parameters(path)
+        for kind in sorted(set(reference) | set(parameters)):
+            expected, found = reference.get(kind), parameters.get(kind)
+            if expected != found:
+                problems.append(
+                    f"{path.name} {kind}: {found} (expected {expected} "
+                    f"from {segments[0].name})"
+                )
+    if problems:
+        raise IncompatibleSegments(
+            "Segments cannot be joined with stream copy:\n  " + "\n  ".join(problems)
+        )
+
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_segment_records(segments, previous):
+    """Hash the segments, reusing recorded hashes of files whose size and
+    modification time have not changed."""
+    known = {record["file"]: record for record in previous.get("segments", [])}
+    records = []
+    for path in segments:
+        stat = path.stat()
+        record = known.get(str(path))
+        if not (
+            record
+            and record["size"] == stat.st_size
+            and record["mtime_ns"] == stat.st_mtime_ns
+        ):
+            record = {
+                "file": str(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": hash_file(path),
+            }
+        records.append(record)
+    return records
+
+
+def concat(segments, output):
+    list_file = output.with_name(output.name + ".txt")
+    quoted = [str(path).replace("'", "'\\''") for path in segments]
+    list_file.write_text("".join(f"file '{path}'\n" for path in quoted))
+    tmp_output = output.with_name(".tmp-" + output.name)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-y",
+                "-loglevel",
+                "error",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                str(list_file),
+                "-c",
+                "copy",
+                str(tmp_output),
+            ],
+            check=True,
+        )
+        os.replace(tmp_output, output)
+    finally:
+        list_file.unlink(missing_ok=True)
+        tmp_output.unlink(missing_ok=True)
+
+
+def assemble(video_dir, output, manifest=None, force=False):
+    """Write the final cut to ``output``; return False if it was up to date."""
+    segments = read_manifest(video_dir, manifest)
+    state_file = output.with_name(output.name + ".json")
+    try:
+        previous = json.loads(state_file.read_text())
+    except (OSError, ValueError):
+        previous = {}
+    records = get_segment_records(segments, previous)
+    hashes = [record["sha256"] for record in records]
+    if (
+        not force
+        and output.exists()
+        and hashes == [record["sha256"] for record in previous.get("segments", [])]
+    ):
+        if records != previous["segments"]:
+            # Touched but identical: record the new size and modification
+            # time so that they are not hashed again next time.
+            state_file.write_text(json.dumps({"segments": records}, indent=1))
+        return False
+    check_compatible(segments)
+    concat(segments, output)
+    state_file.write_text(json.dumps({"segments": records}, indent=1))
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-q", "--quality", choices=QUALITIES, default="h")
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("--manifest", default=None)
+    parser.add_argument("--media-dir", default="media")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    quality_dir = QUALITY_DIRS[args.quality]
+    video_dir = Path(args.media_dir) / "videos" / "main_scene" / quality_dir
+    if args.output is not None:
+        output = Path(args.output)
+    elif args.quality == "h":
+        output = Path("final_cut.mp4")
+    else:
+        output = Path(f"final_cut_{quality_dir}.mp4")
+
+    try:
+        changed = assemble(video_dir, output.resolve(), args.manifest, args.force)
+    except (FileNotFoundError, IncompatibleSegments) as e:
+        sys.exit(str(e))
+    print(f"Wrote {output}" if changed else f"{output} is up to date")
+
+
+if __name__ == "__main__":
+    main()
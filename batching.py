@@ -0,0 +1,283 @@
+"""Interpolate groups of similar animations in one vectorized update.
+
+``LaggedStartMap(FadeOut, self.mobjects)`` or ``FadeOut(Group(...))`` end up
+as one ``Transform`` per mobject, and every frame each of them interpolates
+every member of its family on its own: points, then each color and width
+attribute, as separate small numpy operations.
+
+``batch_animation`` looks at an animation when it begins. Its transforms
+(including nested ``AnimationGroup``, ``LaggedStart`` and ``LaggedStartMap``
+members) that interpolate along a straight path get their members' start
+and target arrays concatenated per attribute, and the members are given
+views into one shared buffer per attribute. Every frame, the animation
+groups still compute each transform's alpha as usual; the lag within each
+transform and its rate function are then applied to a vector of member
+alphas, and each buffer is updated with one multiply-add. Members that
+cannot be batched, like images, and animations of other types are
+interpolated by manim as before. The final frame (alpha 1) always goes
+through manim, so the mobjects end up exactly as without batching.
+
+Set ``RENDER_BATCHING=0`` to disable batching.
+"""
+import os
+
+import numpy as np
+from manim import Animation, AnimationGroup, Mobject, Transform, VMobject
+from manim.utils.bezier import interpolate
+from manim.utils.paths import straight_path
+
+# The attributes VMobject.interpolate sets, see VMobject.interpolate_color.
+ATTRS = [
+    "points",
+    "fill_rgbas",
+    "stroke_rgbas",
+    "background_stroke_rgbas",
+    "stroke_width",
+    "background_stroke_width",
+    "sheen_direction",
+    "sheen_factor",
+]
+# Fewer members are not worth setting up the buffers for.
+MIN_MEMBERS = 8
+
+
+def is_enabled():
+    return os.environ.get("RENDER_BATCHING", "1") != "0"
+
+
+def _is_group(animation):
+    return (
+        isinstance(animation, AnimationGroup)
+        and type(animation).interpolate is AnimationGroup.interpolate
+    )
+
+
+def _get_leaves(animation):
+    if _is_group(animation):
+        return [leaf for anim in animation.animations for leaf in _get_leaves(anim)]
+    return [animation]
+
+
+def _is_batchable(animation):
+    cls = type(animation)
+    return (
+        isinstance(animation, Transform)
+        and cls.interpolate is Animation.interpolate
+        and cls.interpolate_mobject is Animation.interpolate_mobject
+        and cls.get_sub_alpha is Animation.get_sub_alpha
+        and cls.interpolate_submobject is Transform.interpolate_submobject
+        and animation.path_func is straight_path()
+    )
+
+
+def _is_batchable_member(animation, mobs):
+    if not all(isinstance(mob, VMobject) for mob in mobs):
+        return False
+    cls = type(mobs[0])
+    if not (
+        cls.interpolate is Mobject.interpolate
+        and cls.interpolate_color is VMobject.interpolate_color
+    ):
+        return False
+    if not animation.suspend_mobject_updating and mobs[0].get_updaters():
+        # An updater could replace the arrays batching writes into.
+        return False
+    return True
+
+
+def _is_vectorized(rate_func):
+    values = np.linspace(0, 1, 3)
+    try:
+        result = np.asarray(rate_func(values), dtype=float)
+    except (TypeError, ValueError):
+        return False
+    return result.shape == values.shape
+
+
+class _ArrayAttr:
+    """One attribute of the batched members, in a shared buffer."""
+
+    def __init__(self, name, members, indices):
+        self.name = name
+        starts = [np.asarray(getattr(start, name), float) for _, start, _ in members]
+        targets = [
+            np.asarray(getattr(target, name), float) for _, _, target in members
+        ]
+        self.start = np.concatenate([value.reshape(len(value), -1) for value in starts])
+        self.target = np.concatenate(
+            [value.reshape(len(value), -1) for value in targets]
+        )
+        self.buffer = self.start.copy()
+        self.member_rows = np.repeat(indices, [len(value) for value in starts])
+        row = 0
+        for (mob, _, _), value in zip(members, starts):
+            setattr(mob, name, self.buffer[row : row + len(value)].reshape(value.shape))
+            row += len(value)
+
+    def update(self, alphas):
+        if alphas.min() == alphas.max():
+            alpha = alphas[0]
+        else:
+            alpha = alphas[self.member_rows][:, None]
+        # The same expression as manim's interpolate(start, target, alpha).
+        np.multiply(self.start, 1 - alpha, out=self.buffer)
+        self.buffer += self.target * alpha
+
+
+class AnimationBatch:
+    """The batchable transforms of an animation, interpolated together."""
+
+    def __init__(self, animation):
+        self.animation = animation
+        self.leaves = [
+            leaf for leaf in _get_leaves(animation) if _is_batchable(leaf)
+        ]
+        self.leaf_alphas = np.zeros(len(self.leaves))
+        members = []
+        member_leaves = []
+        lower = []
+        full_length = []
+        rate_funcs = {}
+        self.fallback = []
+        for leaf_index, leaf in enumerate(self.leaves):
+            families = list(leaf.get_all_families_zipped())
+            length = (len(families) - 1) * leaf.lag_ratio + 1
+            for index, mobs in enumerate(families):
+                if _is_batchable_member(leaf, mobs):
+                    rate_funcs.setdefault(leaf.rate_func, []).append(len(members))
+                    members.append(mobs)
+                    member_leaves.append(leaf_index)
+                    lower.append(index * leaf.lag_ratio)
+                    full_length.append(length)
+                else:
+                    self.fallback.append((leaf_index, leaf, index, len(families), mobs))
+        self.members = members
+        self.member_leaves = np.array(member_leaves, dtype=int)
+        self.lower = np.array(lower, dtype=float)
+        self.full_length = np.array(full_length, dtype=float)
+        self.rate_funcs = [
+            (rate_func, np.array(indices), _is_vectorized(rate_func))
+            for rate_func, indices in rate_funcs.items()
+        ]
+        self.arrays = []
+        self.scalars = []
+
+    def _add_attr(self, name):
+        values = [
+            (getattr(start, name), getattr(target, name))
+            for _, start, target in self.members
+        ]
+        if all(np.array_equal(start, target) for start, target in values):
+            # Interpolating would not change anything.
+            return
+        # Members without any value, like the points of a group or of the
+        # root of a Tex, have nothing to interpolate; the others can still
+        # share a buffer.
+        indices = [
+            index
+            for index, (start, target) in enumerate(values)
+            if not (
+                isinstance(start, np.ndarray)
+                and start.ndim
+                and not len(start)
+                and start.shape == np.shape(target)
+            )
+        ]
+        if not indices:
+            return
+        values = [values[index] for index in indices]
+        if (
+            all(
+                isinstance(start, np.ndarray)
+                and start.ndim
+                and start.shape == np.shape(target)
+                for start, target in values
+            )
+            and len({start[0].size for start, _ in values}) == 1
+        ):
+            members = [self.members[index] for index in indices]
+            self.arrays.append(_ArrayAttr(name, members, indices))
+        else:
+            self.scalars.append(name)
+
+    def __len__(self):
+        return len(self.members)
+
+    def install(self):
+        for name in ATTRS:
+            self._add_attr(name)
+        for index, leaf in enumerate(self.leaves):
+            if leaf is not self.animation:
+                leaf.interpolate = lambda alpha, index=index: self._record(index, alpha)
+        self.animation.interpolate = self.interpolate
+
+    def uninstall(self):
+        for leaf in self.leaves:
+            leaf.__dict__.pop("interpolate", None)
+        self.animation.__dict__.pop("interpolate", None)
+
+    def _record(self, index, alpha):
+        self.leaf_alphas[index] = alpha
+
+    def get_member_alphas(self):
+        """Vectorized ``Animation.get_sub_alpha`` for every member."""
+        values = np.clip(
+            self.leaf_alphas[self.member_leaves] * self.full_length - self.lower, 0, 1
+        )
+        alphas = np.empty_like(values)
+        for rate_func, indices, vectorized in self.rate_funcs:
+            if vectorized:
+                alphas[indices] = rate_func(values[indices])
+            else:
+                alphas[indices] = [rate_func(value) for value in values[indices]]
+        return alphas
+
+    def interpolate(self, alpha):
+        if alpha >= 1:
+            self.uninstall()
+            self.animation.interpolate(alpha)
+            return
+        if self.animation in self.leaves:
+            self.leaf_alphas[0] = alpha
+        else:
+            # The groups compute the alpha of every transform; batchable ones
+            # are recorded, the others interpolate themselves.
+            type(self.animation).interpolate(self.animation, alpha)
+        alphas = self.get_member_alphas()
+        for array in self.arrays:
+            array.update(alphas)
+        for name in self.scalars:
+            for (mob, start, target), member_alpha in zip(self.members, alphas):
+                value = interpolate(
+                    getattr(start, name), getattr(target, name), member_alpha
+                )
+                setattr(mob, name, value)
+        for leaf_index, leaf, index, count, mobs in self.fallback:
+            sub_alpha = leaf.get_sub_alpha(self.leaf_alphas[leaf_index], index, count)
+            leaf.interpolate_submobject(*mobs, sub_alpha)
+
+
+def batch_animation(animation):
+    """Interpolate the batchable parts of ``animation`` together once it begins."""
+    if not is_enabled() or not any(
+        _is_batchable(leaf) for leaf in _get_leaves(animation)
+    ):
+        return animation
+
+    def begin():
+        del animation.begin
+        animation.begin()
+        batch = AnimationBatch(animation)
+        if len(batch) >= MIN_MEMBERS:
+            batch.install()
+
+    animation.begin = begin
+    return animation
+
+
+class BatchedAnimationMixin:
+    """Mixin for scenes that batches the animations passed to ``play``."""
+
+    def compile_animations(self, *args, **kwargs):
+        animations = super().compile_animations(*args, **kwargs)
+        return [batch_animation(animation) for animation in animations]
@@ -0,0 +1,438 @@
+"""Benchmarks for the custom mobjects, animations and sections of the video.
+
+Every benchmark runs with fixed random seeds, the offline speech backend
+and low quality render settings. Its time is the median of ``--repeat``
+measurements, and its peak memory is measured in one more run under
+tracemalloc. Results are compared with the baseline stored in
+``benchmark_baseline.json``: a benchmark regresses when its time or peak
+memory grows by more than ``--threshold`` / ``--memory-threshold``, and the
+exit status is then 1.
+
+    python benchmark.py [NAME ...] [--save] [--ci] [--threshold 0.2] [--repeat 5]
+
+NAME selects the benchmarks whose names start with it; ``--save`` stores
+the results as the new baseline. Baselines are only comparable on the
+machine they were recorded on, so none is committed: record one on the CI
+machine first. With ``--ci`` (or the ``CI`` environment variable set), a
+missing baseline, a benchmark without a baseline entry or one that could
+not run fails the run too, instead of passing unchecked.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from render import configure, get_scene_class
+
+BASELINE_FILE = Path(__file__).with_name("benchmark_baseline.json")
+SEED = 0
+FRAME_DT = 1 / 60
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # Prepares the benchmark and returns the function that is timed.
+    setup: object
+    # Calls of that function per measurement; times are per call.
+    number: int = 1
+    repeat: int = None
+
+
+def _seed():
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+
+def _setup_wave_construction(ov, Dt):
+    from main_scene import Wave, get_wave_engine
+
+    def run():
+        get_wave_engine.cache_clear()
+        Wave(ov=ov, Dt=Dt)
+
+    return run
+
+
+def _write_noise_audio(path, seconds):
+    import wave
+
+    rng = np.random.default_rng(SEED)
+    with wave.open(str(path), "wb") as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(2)
+        audio.setframerate(24000)
+        for _ in range(seconds):
+            samples = rng.normal(0, 3000, 24000) * rng.random()
+            audio.writeframes(samples.astype(np.int16).tobytes())
+
+
+def _setup_audio_envelope(seconds):
+    import waveform
+
+    audio_dir = Path(tempfile.mkdtemp())
+    path = audio_dir / "narration.wav"
+    _write_noise_audio(path, seconds)
+
+    def run():
+        waveform.get_envelope.cache_clear()
+        for derived in audio_dir.glob("narration.wav.*"):
+            derived.unlink()
+        waveform.get_envelope(path)
+
+    return run
+
+
+def _setup_wave_updater(seconds):
+    from types import SimpleNamespace
+
+    from manim import LEFT
+    from main_scene import AudioWave
+
+    from waveform import SoundTrack
+
+    track = SoundTrack()
+    if seconds:
+        path = Path(tempfile.mkdtemp()) / "narration.wav"
+        _write_noise_audio(path, seconds)
+        track.add(path, 0)
+    # The updater the scenes run reads the time off the scene's renderer.
+    scene = SimpleNamespace(renderer=SimpleNamespace(time=0))
+    wave = AudioWave(track).scale(0.5).shift(2 * LEFT)
+    wave.add_updater(AudioWave.get_audio_updater(scene))
+    # Decode and bind the buffers outside the measurement: this is the
+    # per-frame cost once the updater is running.
+    wave.update(FRAME_DT)
+    frames = max(seconds, 1) * 60
+
+    def run():
+        scene.renderer.time = (scene.renderer.time + FRAME_DT) % (frames * FRAME_DT)
+        wave.update(FRAME_DT)
+
+    return run
+
+
+def _setup_grow_from_side(size):
+    from manim import LEFT, Square, VGroup
+    from main_scene import GrowFromSide
+
+    group = VGroup(*[Square(0.2) for _ in range(size)]).arrange_in_grid()
+    frames = 60
+
+    def run():
+        animation = GrowFromSide(group.copy(), LEFT)
+        animation.begin()
+        for i in range(frames + 1):
+            animation.interpolate(i / frames)
+        animation.finish()
+
+    return run
+
+
+def _setup_fade_out(size, batched):
+    from manim import FadeOut, LaggedStartMap, Square, VGroup
+
+    from batching import batch_animation
+
+    # Pairs of squares in groups without points of their own, like the
+    # mobjects of the scenes.
+    group = VGroup(
+        *[VGroup(Square(0.2), Square(0.1)) for _ in range(size // 2)]
+    ).arrange_in_grid()
+    frames = 60
+
+    def run():
+        animation = LaggedStartMap(FadeOut, group.copy(), lag_ratio=0.01)
+        if batched:
+            animation = batch_animation(animation)
+        animation.begin()
+        for i in range(frames + 1):
+            animation.interpolate(i / frames)
+        animation.finish()
+
+    return run
+
+
+def _setup_style_rectangle():
+    from manim import Tex
+    from main_scene import StyleRectangle
+
+    box = StyleRectangle(Tex("Style"))
+
+    def run():
+        box.generate_points()
+
+    return run
+
+
+def _setup_code_frame(atlas):
+    from manim import Camera, Code
+    from main_scene import _CODE1
+
+    from glyph_atlas import atlas_text
+
+    code = Code(code=_CODE1, language="python", style="monokai", font="Consolas")
+    if atlas:
+        atlas_text(code)
+    camera = Camera()
+    # Glyphs go into the atlas once they are seen unchanged.
+    for _ in range(2):
+        camera.reset()
+        camera.capture_mobjects([code])
+
+    def run():
+        camera.reset()
+        camera.capture_mobjects([code])
+
+    return run
+
+
+def _setup_startup(backend, construct):
+    # Scenes are imported in a fresh interpreter, like a render worker does.
+    code = "import main_scene"
+    if construct:
+        code += "; main_scene.SPEECH_SYNTHESIZER.synthesizer.synthesizer"
+    env = dict(os.environ, SPEECH_BACKEND=backend)
+
+    def run():
+        subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(__file__).parent,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+
+    return run
+
+
+def _setup_section_render(scene, section):
+    from manim import tempconfig
+
+    def run():
+        with tempfile.TemporaryDirectory() as media_dir:
+            with tempconfig({"media_dir": media_dir}):
+                get_scene_class(scene, section)().render()
+
+    return run
+
+
+BENCHMARKS = [
+    *[
+        Benchmark(
+            f"wave_construction[ov={ov},Dt={Dt}]",
+            lambda ov=ov, Dt=Dt: _setup_wave_construction(ov, Dt),
+            number=10,
+        )
+        for ov in [6, 12, 24]
+        for Dt in [0.1, 0.02]
+    ],
+    # Silent narration, as from the offline backend, and a ten minute track.
+    Benchmark(
+        "wave_updater_frame[silent]", lambda: _setup_wave_updater(0), number=600
+    ),
+    Benchmark(
+        "wave_updater_frame[600s]", lambda: _setup_wave_updater(600), number=600
+    ),
+    # A ten minute narration, decoded and reduced once.
+    Benchmark("audio_envelope[600s]", lambda: _setup_audio_envelope(600)),
+    Benchmark("grow_from_side[10]", lambda: _setup_grow_from_side(10), number=5),
+    Benchmark("grow_from_side[1000]", lambda: _setup_grow_from_side(1000)),
+    *[
+        Benchmark(
+            f"fade_out[{size}{',batched' if batched else ''}]",
+            lambda size=size, batched=batched: _setup_fade_out(size, batched),
+        )
+        for size in [100, 1000]
+        for batched in [False, True]
+    ],
+    Benchmark("style_rectangle_points", _setup_style_rectangle, number=100),
+    *[
+        Benchmark(
+            f"code_frame[{'atlas' if atlas else 'outlines'}]",
+            lambda atlas=atlas: _setup_code_frame(atlas),
+            number=10,
+        )
+        for atlas in [False, True]
+    ],
+    # The speech backend is only loaded on the first synthesis; the
+    # difference to startup[<backend>] is what that saves every process that
+    # never synthesizes.
+    Benchmark("startup[lazy]", lambda: _setup_startup("azure", False)),
+    *[
+        Benchmark(
+            f"startup[{backend}]", lambda backend=backend: _setup_startup(backend, True)
+        )
+        for backend in ["azure", "gtts"]
+    ],
+    *[
+        Benchmark(
+            f"render[{scene}.{section}]",
+            lambda scene=scene, section=section: _setup_section_render(
+                scene, section
+            ),
+            repeat=1,
+        )
+        for scene in ["Scene1", "Scene2"]
+        for section in ["sub1", "sub2"]
+    ],
+]
+
+
+def measure(benchmark, repeat):
+    """Return the median time per call and the peak traced memory."""
+    _seed()
+    run = benchmark.setup()
+    times = []
+    for _ in range(benchmark.repeat or repeat):
+        _seed()
+        start = time.perf_counter()
+        for _ in range(benchmark.number):
+            run()
+        times.append((time.perf_counter() - start) / benchmark.number)
+    _seed()
+    tracemalloc.start()
+    try:
+        for _ in range(benchmark.number):
+            run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"time": statistics.median(times), "peak": peak}
+
+
+def get_machine():
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "numpy": np.__version__,
+    }
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """Print every result next to its baseline; return the regressed names."""
+    regressed = []
+    limits = {"time": threshold, "peak": memory_threshold}
+    for name, result in results.items():
+        previous = baseline.get(name)
+        columns = []
+        failed = False
+        for key, unit, scale in [("time", "ms", 1e3), ("peak", "MB", 1 / 2**20)]:
+            column = f"{key} {result[key] * scale:10.3f}{unit}"
+            if previous is not None and previous[key]:
+                change = result[key] / previous[key] - 1
+                column += f" ({change:+7.1%})"
+                failed |= change > limits[key]
+            columns.append(column)
+        status = "new" if previous is None else "REGRESSED" if failed else "ok"
+        print(f"{name:<32} {'  '.join(columns)}  {status}")
+        if failed:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--memory-threshold", type=float, default=0.2)
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the baseline"
+    )
+    parser.add_argument(
+        "--ci",
+        action="store_true",
+        default=bool(os.environ.get("CI")),
+        help="fail on a missing baseline or benchmark instead of passing",
+    )
+    args = parser.parse_args()
+
+    from manim import config
+
+    # Renders go to a fresh media directory each time, but keep using the
+    # regular speech and Tex caches so that only rendering is measured.
+    # These are read when main_scene is first imported.
+    os.environ.setdefault("SPEECH_BACKEND", "offline")
+    for variable, name in [
+        ("SPEECH_CACHE_DIR", "voiceover_cache"),
+        ("TEX_CACHE_DIR", "tex_cache"),
+    ]:
+        os.environ.setdefault(variable, str(Path(config.media_dir).resolve() / name))
+    configure("low_quality")
+    config.disable_caching = True
+    config.verbosity = "WARNING"
+    config.progress_bar = "none"
+
+    benchmarks = [
+        benchmark
+        for benchmark in BENCHMARKS
+        if not args.names
+        or any(benchmark.name.startswith(name) for name in args.names)
+    ]
+    results = {}
+    skipped = []
+    for benchmark in benchmarks:
+        try:
+            results[benchmark.name] = measure(benchmark, args.repeat)
+        except Exception as e:
+            # e.g. a backend or a LaTeX install missing on this machine.
+            error = []
+            if isinstance(e, subprocess.CalledProcessError) and e.stderr:
+                error = e.stderr.decode(errors="replace").strip().splitlines()
+            reason = error[-1] if error else f"{type(e).__name__}: {e}"
+            print(f"Skipping {benchmark.name}: {reason}")
+            skipped.append(benchmark.name)
+
+    try:
+        stored = json.loads(BASELINE_FILE.read_text())
+    except (OSError, ValueError):
+        stored = {}
+    if args.ci and not args.save and not stored:
+        sys.exit(
+            f"No baseline in {BASELINE_FILE.name}: "
+            "record one on this machine with --save"
+        )
+    if stored and stored.get("machine") != get_machine():
+        print("Warning: the baseline was recorded on a different setup")
+    regressed = compare(
+        results, stored.get("results", {}), args.threshold, args.memory_threshold
+    )
+
+    if args.save:
+        baseline = {**stored.get("results", {}), **results}
+        BASELINE_FILE.write_text(
+            json.dumps({"machine": get_machine(), "results": baseline}, indent=1)
+        )
+        print(f"Saved {len(results)} results to {BASELINE_FILE.name}")
+    elif regressed:
+        sys.exit(
+            f"{len(regressed)} benchmarks regressed past the thresholds: "
+            + ", ".join(regressed)
+        )
+    elif args.ci:
+        unchecked = skipped + [
+            name for name in results if name not in stored.get("results", {})
+        ]
+        if unchecked:
+            sys.exit(
+                f"{len(unchecked)} benchmarks were not checked against the "
+                "baseline: " + ", ".join(unchecked)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Render cache at the granularity of ``with self.voiceover(...)`` blocks.
+
+Each block is keyed on its narration (through the speech cache key, so the
+voice and speed count too), its own code, the code around it, the incoming
+scene state and the render config. On a hit the block is executed with
+animation rendering skipped, which only advances the scene to the block's
+end state, and the block's previously encoded partial movie files are
+spliced in instead. Rendering therefore resumes at the first block whose key
+changed.
+
+Code is compared as ASTs, so formatting and comments do not invalidate
+anything. The code around a block is everything in the module except the
+voiceover blocks themselves: editing one block leaves the other blocks'
+keys alone, while editing setup code in a method, a helper mobject or a
+module constant invalidates every block that could depend on it.
+"""
+import ast
+import copy
+import functools
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+
+from manim import __version__ as manim_version
+from manim import config, logger
+from manim.utils.hashing import get_hash_from_play_call
+
+from speech import normalize_text
+from timeline import get_caller_frame
+
+CONFIG_KEYS = [
+    "pixel_width",
+    "pixel_height",
+    "frame_rate",
+    "background_color",
+    "background_opacity",
+    "transparent",
+    "movie_file_extension",
+]
+
+
+def _is_voiceover_with(node):
+    return isinstance(node, ast.With) and any(
+        isinstance(item.context_expr, ast.Call)
+        and isinstance(item.context_expr.func, ast.Attribute)
+        and item.context_expr.func.attr == "voiceover"
+        for item in node.items
+    )
+
+
+class _StripVoiceovers(ast.NodeTransformer):
+    def visit_With(self, node):
+        if _is_voiceover_with(node):
+            return ast.Pass()
+        return self.generic_visit(node)
+
+
+class _StripVoiceoverMethods(ast.NodeTransformer):
+    def visit_FunctionDef(self, node):
+        if any(_is_voiceover_with(child) for child in ast.walk(node)):
+            return None
+        return node
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_module(filename, mtime_ns):
+    tree = ast.parse(Path(filename).read_text(), filename=filename)
+    module_context = ast.dump(_StripVoiceoverMethods().visit(copy.deepcopy(tree)))
+    return tree, module_context
+
+
+@functools.lru_cache(maxsize=None)
+def _get_block_context(filename, mtime_ns, lineno):
+    tree, module_context = _parse_module(filename, mtime_ns)
+    block = method = None
+    for node in ast.walk(tree):
+        start, end = getattr(node, "lineno", None), getattr(node, "end_lineno", None)
+        if start is None or not start <= lineno <= end:
+            continue
+        if _is_voiceover_with(node) and node.body[0].lineno > lineno:
+            if block is None or node.lineno > block.lineno:
+                block = node
+        elif isinstance(node, ast.FunctionDef):
+            if method is None or node.lineno > method.lineno:
+                method = node
+    if block is None or method is None:
+        return None
+    method_context = ast.dump(_StripVoiceovers().visit(copy.deepcopy(method)))
+    return module_context, method_context, ast.dump(block)
+
+
+def get_block_context(frame):
+    """Return the code that the voiceover block called from ``frame``
+    depends on, or None if the call is not part of a ``with`` statement."""
+    if frame is None:
+        return None
+    filename = frame.f_code.co_filename
+    try:
+        mtime_ns = os.stat(filename).st_mtime_ns
+    except OSError:
+        return None
+    return _get_block_context(filename, mtime_ns, frame.f_lineno)
+
+
+class BlockCacheMixin:
+    """Mixin for voiceover scenes that caches the frames of every block."""
+
+    block_cache_dir = None
+
+    def voiceover(self, text, **kwargs):
+        return self._voiceover_block(text, get_caller_frame(), **kwargs)
+
+    def _get_block_cache_dir(self):
+        if self.block_cache_dir is not None:
+            return Path(self.block_cache_dir)
+        return Path(config.media_dir) / "block_cache"
+
+    def _can_cache_blocks(self):
+        renderer = self.renderer
+        return (
+            config.write_to_movie
+            and not config.disable_caching
+            and hasattr(renderer, "file_writer")
+            and hasattr(renderer.file_writer, "partial_movie_files")
+            and not getattr(renderer, "_original_skipping_status", True)
+        )
+
+    def get_block_key(self, text, frame):
+        context = get_block_context(frame)
+        if context is None:
+            return None
+        get_speech_key = getattr(self.speech_synthesizer, "get_key", normalize_text)
+        fields = [
+            get_speech_key(text),
+            *context,
+            get_hash_from_play_call(self, self.renderer.camera, [], self.mobjects),
+            [str(config[key]) for key in CONFIG_KEYS],
+            manim_version,
+        ]
+        return hashlib.sha256(json.dumps(fields).encode()).hexdigest()
+
+    def _load_block(self, key):
+        block_dir = self._get_block_cache_dir() / key
+        try:
+            files = json.loads((block_dir / "block.json").read_text())["files"]
+        except (OSError, ValueError):
+            return None
+        files = [str(block_dir / name) for name in files]
+        if not all(os.path.exists(path) for path in files):
+            return None
+        return files
+
+    def _store_block(self, key, files):
+        block_dir = self._get_block_cache_dir() / key
+        block_dir.mkdir(parents=True, exist_ok=True)
+        names = []
+        for i, path in enumerate(files):
+            name = f"{i:04}{Path(path).suffix}"
+            target = block_dir / name
+            target.unlink(missing_ok=True)
+            try:
+                os.link(path, target)
+            except OSError:
+                shutil.copyfile(path, target)
+            names.append(name)
+        tmp_path = block_dir / f"block.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps({"files": names}))
+        os.replace(tmp_path, block_dir / "block.json")
+
+    @contextmanager
+    def _voiceover_block(self, text, frame, **kwargs):
+        key = self.get_block_key(text, frame) if self._can_cache_blocks() else None
+        del frame
+        cached_files = self._load_block(key) if key is not None else None
+        renderer = self.renderer
+        if key is not None:
+            partial_movie_files = renderer.file_writer.partial_movie_files
+            start = len(partial_movie_files)
+        try:
+            with super().voiceover(text=text, **kwargs) as tracker:
+                # The narration has been added by now, so skipping the
+                # animations of the block does not drop its audio.
+                if cached_files is not None:
+                    logger.info(f"Reusing cached voiceover block {key[:12]}")
+                    renderer._original_skipping_status = True
+                    renderer.skip_animations = True
+                yield tracker
+        finally:
+            if cached_files is not None:
+                renderer._original_skipping_status = False
+                renderer.skip_animations = False
+        if cached_files is not None:
+            partial_movie_files[start:] = cached_files
+        elif key is not None:
+            files = [f for f in partial_movie_files[start:] if f is not None]
+            self._store_block(key, files)
@@ -0,0 +1,205 @@
+"""Scene-state checkpoints at voiceover boundaries, and time-range shards.
+
+Every ``with self.voiceover(...)`` block starts at a checkpoint: a compact
+record of the scene going into the block, with the timeline position
+(scene time, number of plays), the camera frame, the top-level mobjects
+with the size of their families, the registered updaters by name and a
+hash of the whole state. A full render writes them to
+``media/checkpoints/<Scene>.json``.
+
+A scene with ``checkpoint_range = (start, end)`` renders only from
+checkpoint ``start`` up to checkpoint ``end``: everything before is run
+with animations skipped, which rebuilds the state without drawing or
+encoding a frame, and the scene ends at ``end``. Its narration is shifted
+so that the movie starts at the first checkpoint. Python cannot resume
+``construct()`` halfway through, and updaters are closures that cannot be
+pickled, so this fast-forward is how a render starts from a checkpoint; on
+arrival the state is compared with ``checkpoint_expected``, and a scene
+that got there in a different state (e.g. from unseeded randomness) fails
+instead of rendering wrong frames.
+
+``get_shards(scene_class, count)`` runs the scene once without rendering
+to collect its checkpoints and splits it into ``count`` time ranges of
+about equal length; ``render.py --shards N`` renders them in parallel.
+"""
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from manim import config, logger, tempconfig
+from manim.utils.exceptions import EndSceneEarlyException
+from manim.utils.hashing import get_hash_from_play_call
+
+from timeline import get_caller
+
+
+@dataclass
+class Checkpoint:
+    index: int
+    method: str
+    lineno: int
+    time: float
+    num_plays: int
+    camera: dict
+    mobjects: list = field(default_factory=list)
+    updaters: list = field(default_factory=list)
+    state_hash: str = None
+
+
+@dataclass
+class Shard:
+    index: int
+    # Checkpoint indices; None for the start or the end of the scene.
+    start: int = None
+    end: int = None
+    # The checkpoint the shard starts at.
+    expected: dict = None
+
+
+def _get_updater_name(updater):
+    return getattr(updater, "__qualname__", type(updater).__name__)
+
+
+def get_checkpoint_dir():
+    return Path(config.media_dir) / "checkpoints"
+
+
+def write_checkpoints(name, checkpoints):
+    checkpoint_dir = get_checkpoint_dir()
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    path = checkpoint_dir / f"{name}.json"
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps([asdict(c) for c in checkpoints], indent=1))
+    os.replace(tmp_path, path)
+    return path
+
+
+class CheckpointMixin:
+    """Mixin for voiceover scenes that records a checkpoint at every block.
+
+    Set ``checkpoint_range`` to render only part of the scene.
+    """
+
+    checkpoint_range = None
+    checkpoint_expected = None
+    checkpoints = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.checkpoint_range is not None:
+            if self.checkpoint_range[0] is not None:
+                self._fast_forward()
+
+    def get_checkpoint(self, index):
+        camera = self.renderer.camera
+        mobjects = self.mobjects
+        updaters = [
+            {"mobject": i, "updater": _get_updater_name(updater)}
+            for i, mob in enumerate(mobjects)
+            for member in mob.get_family()
+            for updater in member.get_updaters()
+        ]
+        updaters += [
+            {"mobject": None, "updater": _get_updater_name(updater)}
+            for updater in self.updaters
+        ]
+        return Checkpoint(
+            index,
+            *get_caller(),
+            self.renderer.time,
+            self.renderer.num_plays,
+            {
+                "frame_center": [float(x) for x in camera.frame_center],
+                "frame_width": float(camera.frame_width),
+                "frame_height": float(camera.frame_height),
+            },
+            [
+                {"class": type(mob).__name__, "family": len(mob.get_family())}
+                for mob in mobjects
+            ],
+            updaters,
+            get_hash_from_play_call(self, camera, [], mobjects),
+        )
+
+    def voiceover(self, text, **kwargs):
+        if self.checkpoints is None:
+            self.checkpoints = []
+        checkpoint = self.get_checkpoint(len(self.checkpoints))
+        self.checkpoints.append(checkpoint)
+        if self.checkpoint_range is not None:
+            start, end = self.checkpoint_range
+            if checkpoint.index == end:
+                raise EndSceneEarlyException()
+            if checkpoint.index == start:
+                self._start_at_checkpoint(checkpoint)
+        return super().voiceover(text, **kwargs)
+
+    def _fast_forward(self):
+        renderer = self.renderer
+        renderer._original_skipping_status = True
+        renderer.skip_animations = True
+
+    def _start_at_checkpoint(self, checkpoint):
+        expected = self.checkpoint_expected
+        if expected is not None and expected["state_hash"] != checkpoint.state_hash:
+            raise RuntimeError(
+                f"{type(self).__name__} reached checkpoint {checkpoint.index} "
+                f"(line {checkpoint.lineno}) in a different state than expected"
+            )
+        logger.info(f"Rendering from checkpoint {checkpoint.index}")
+        renderer = self.renderer
+        renderer._original_skipping_status = False
+        renderer.skip_animations = False
+        # The movie starts at the checkpoint, so must the narration.
+        file_writer = renderer.file_writer
+        add_sound = file_writer.add_sound
+
+        def shifted_add_sound(sound_file, time=None, gain=None, **kwargs):
+            if time is not None:
+                time -= checkpoint.time
+            return add_sound(sound_file, time, gain, **kwargs)
+
+        file_writer.add_sound = shifted_add_sound
+
+    def tear_down(self):
+        super().tear_down()
+        if self.checkpoint_range is None and self.checkpoints:
+            write_checkpoints(type(self).__name__, self.checkpoints)
+
+
+def collect_checkpoints(scene_class):
+    """Run ``scene_class`` without rendering.
+
+    Returns its checkpoints and its duration.
+    """
+    with tempconfig({"dry_run": True, "disable_caching": True}):
+        scene = scene_class(skip_animations=True)
+        # Animations are skipped, see timeline.run_timeline.
+        scene.renderer.save_static_frame_data = lambda scene, mobjects: None
+        scene.render()
+    return scene.checkpoints or [], scene.renderer.time
+
+
+def get_shards(scene_class, count):
+    """Split ``scene_class`` into up to ``count`` shards of similar length."""
+    checkpoints, duration = collect_checkpoints(scene_class)
+    if count <= 1 or not checkpoints:
+        return [Shard(0)]
+    starts = []
+    for k in range(1, count):
+        target = duration * k / count
+        best = min(checkpoints, key=lambda c: abs(c.time - target))
+        if best.index and best.index not in starts:
+            starts.append(best.index)
+    starts.sort()
+    bounds = [None, *starts, None]
+    return [
+        Shard(
+            k,
+            bounds[k],
+            bounds[k + 1],
+            None if bounds[k] is None else asdict(checkpoints[bounds[k]]),
+        )
+        for k in range(len(bounds) - 1)
+    ]
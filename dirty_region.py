@@ -0,0 +1,271 @@
+"""Redraw only the part of the frame that changed since the previous frame.
+
+Within an animation, manim redraws every moving mobject, and everything in
+front of the first one, on top of a cached image of the static mobjects,
+even when only a small part of the frame actually changes. During a long
+narration over a running wave updater that means redrawing the code block,
+the Tex and the wave on every frame to move the wave.
+
+``DirtyRegionMixin`` keeps the previous frame. For every frame it checks
+which of the mobjects to draw changed (points and style); the area they
+covered before and cover now is restored from the static image, and only
+the mobjects overlapping it are drawn again, through a Cairo surface that
+covers just that area. An unchanged frame is not drawn at all.
+
+It falls back to a full redraw whenever the frame cannot be patched exactly:
+on the first frame of an animation, when the camera moves, when the dirty
+area is a large part of the frame, or when something other than a
+``VMobject`` changed or overlaps the dirty area (images and point clouds are
+drawn straight into the full pixel array). Set ``RENDER_DIRTY_REGIONS=0`` to
+always redraw the full frame.
+"""
+import math
+import os
+
+import cairo
+import numpy as np
+from manim import VMobject, config
+
+from pipeline import PipelinedRenderer
+
+# Above this fraction of the frame a full redraw is about as fast.
+MAX_DIRTY_FRACTION = 0.6
+# Miter joins reach up to half the miter limit (10 in Cairo) stroke widths
+# past the points.
+MITER_MARGIN = 5
+VMOBJECT_ATTRS = [
+    "points",
+    "fill_rgbas",
+    "stroke_rgbas",
+    "background_stroke_rgbas",
+    "stroke_width",
+    "background_stroke_width",
+    "sheen_factor",
+    "sheen_direction",
+    "background_image",
+]
+MOBJECT_ATTRS = ["points", "fill_opacity", "stroke_opacity"]
+
+
+def is_enabled():
+    return os.environ.get("RENDER_DIRTY_REGIONS", "1") != "0"
+
+
+def _get_values(mob):
+    if isinstance(mob, VMobject):
+        return [getattr(mob, attr, None) for attr in VMOBJECT_ATTRS]
+    values = [getattr(mob, attr, None) for attr in MOBJECT_ATTRS]
+    if hasattr(mob, "get_pixel_array"):
+        values.append(id(mob.get_pixel_array()))
+    return values
+
+
+def _copy_values(values):
+    return [
+        np.array(value) if isinstance(value, np.ndarray) else value
+        for value in values
+    ]
+
+
+def _equal_values(values1, values2):
+    for value1, value2 in zip(values1, values2):
+        if isinstance(value1, np.ndarray) or isinstance(value2, np.ndarray):
+            if not np.array_equal(value1, value2):
+                return False
+        elif value1 != value2:
+            return False
+    return True
+
+
+def _intersects(box1, box2):
+    return (
+        box1 is not None
+        and box1[0] < box2[2]
+        and box2[0] < box1[2]
+        and box1[1] < box2[3]
+        and box2[1] < box1[3]
+    )
+
+
+class _MobjectState:
+    __slots__ = ("values", "box")
+
+    def __init__(self, values, box):
+        self.values = values
+        self.box = box
+
+
+class DirtyRegionMixin:
+    _frame_family = None
+    _frame_static_image = None
+    _frame_view = None
+    _mobject_states = None
+
+    def _get_view(self):
+        camera = self.camera
+        if "set_pixel_array" in vars(camera):
+            # A snapshot took the pixel array (see snapshot.take_snapshot),
+            # so the next frame gets a new one and must be drawn in full.
+            return None
+        return (
+            id(camera.pixel_array),
+            tuple(camera.frame_center),
+            camera.frame_width,
+            camera.frame_height,
+            camera.pixel_width,
+            camera.pixel_height,
+        )
+
+    def _get_pixel_box(self, mob):
+        points = mob.points
+        if len(points) == 0:
+            return None
+        camera = self.camera
+        pw, ph = camera.pixel_width, camera.pixel_height
+        fw, fh = camera.frame_width, camera.frame_height
+        fc = camera.frame_center
+        margin = 2
+        if isinstance(mob, VMobject):
+            width = max(
+                np.max(mob.stroke_width, initial=0),
+                np.max(mob.background_stroke_width, initial=0),
+            )
+            margin += (
+                MITER_MARGIN
+                * width
+                * camera.cairo_line_width_multiple
+                * max(1, config.frame_width / fw)
+                * pw
+                / fw
+            )
+        xmin, ymin = points[:, :2].min(axis=0)
+        xmax, ymax = points[:, :2].max(axis=0)
+        return (
+            max(math.floor((xmin - fc[0]) * pw / fw + pw / 2 - margin), 0),
+            max(math.floor(ph / 2 - (ymax - fc[1]) * ph / fh - margin), 0),
+            min(math.ceil((xmax - fc[0]) * pw / fw + pw / 2 + margin), pw),
+            min(math.ceil(ph / 2 - (ymin - fc[1]) * ph / fh + margin), ph),
+        )
+
+    def _draw_dirty_region(self, family):
+        """Patch the previous frame into the current one.
+
+        Returns False if the frame has to be drawn in full instead.
+        """
+        states = self._mobject_states
+        changed = []
+        boxes = []
+        for mob in family:
+            state = states[id(mob)]
+            values = _get_values(mob)
+            if _equal_values(state.values, values):
+                continue
+            if not isinstance(mob, VMobject):
+                return False
+            box = self._get_pixel_box(mob)
+            changed.append((mob, _copy_values(values), box))
+            boxes += [box for box in [state.box, box] if box is not None]
+        if not changed:
+            return True
+        for mob, values, box in changed:
+            states[id(mob)] = _MobjectState(values, box)
+        boxes = [box for box in boxes if box[0] < box[2] and box[1] < box[3]]
+        if not boxes:
+            return True
+
+        camera = self.camera
+        pixel_array = camera.pixel_array
+        height, width = pixel_array.shape[:2]
+        x0 = min(box[0] for box in boxes)
+        y0 = min(box[1] for box in boxes)
+        x1 = max(box[2] for box in boxes)
+        y1 = max(box[3] for box in boxes)
+        stride = width * pixel_array.shape[2]
+        offset = y0 * stride + x0 * pixel_array.shape[2]
+        if (y1 - y0) * stride > pixel_array.size - offset:
+            # Cairo wants a whole stride for the last row as well.
+            x0, offset = 0, y0 * stride
+        if (x1 - x0) * (y1 - y0) > MAX_DIRTY_FRACTION * width * height:
+            return False
+        region = (x0, y0, x1, y1)
+        to_draw = [mob for mob in family if _intersects(states[id(mob)].box, region)]
+        if any(
+            not isinstance(mob, VMobject) or mob.get_background_image() is not None
+            for mob in to_draw
+        ):
+            return False
+
+        background = self.static_image
+        if background is None:
+            background = camera.background
+        pixel_array[y0:y1, x0:x1] = background[y0:y1, x0:x1]
+        surface = cairo.ImageSurface.create_for_data(
+            pixel_array.reshape(-1)[offset:],
+            cairo.FORMAT_ARGB32,
+            x1 - x0,
+            y1 - y0,
+            stride,
+        )
+        ctx = cairo.Context(surface)
+        pw, ph = camera.pixel_width, camera.pixel_height
+        fw, fh = camera.frame_width, camera.frame_height
+        fc = camera.frame_center
+        # The camera's own transform, moved to the region's corner.
+        ctx.set_matrix(
+            cairo.Matrix(
+                pw / fw,
+                0,
+                0,
+                -(ph / fh),
+                pw / 2 - fc[0] * pw / fw - x0,
+                ph / 2 + fc[1] * ph / fh - y0,
+            )
+        )
+        camera.get_cairo_context = lambda pixel_array: ctx
+        try:
+            camera.capture_mobjects(to_draw, include_submobjects=False)
+        finally:
+            del camera.get_cairo_context
+        surface.flush()
+        return True
+
+    def update_frame(
+        self,
+        scene,
+        mobjects=None,
+        include_submobjects=True,
+        ignore_skipping=True,
+        **kwargs,
+    ):
+        if self.skip_animations and not ignore_skipping:
+            return
+        family = None
+        if mobjects and include_submobjects and not kwargs:
+            family = self.camera.get_mobjects_to_display(mobjects)
+            view = self._get_view()
+            if (
+                view is not None
+                and view == self._frame_view
+                and self.static_image is self._frame_static_image
+                and len(family) == len(self._frame_family)
+                and all(a is b for a, b in zip(family, self._frame_family))
+                and self._draw_dirty_region(family)
+            ):
+                return
+        super().update_frame(
+            scene, mobjects, include_submobjects, ignore_skipping, **kwargs
+        )
+        self._frame_family = family or []
+        self._frame_static_image = self.static_image
+        # The full redraw may have given the camera a new pixel array.
+        self._frame_view = self._get_view() if family else None
+        self._mobject_states = {
+            id(mob): _MobjectState(
+                _copy_values(_get_values(mob)), self._get_pixel_box(mob)
+            )
+            for mob in family or []
+        }
+
+
+class DirtyRegionRenderer(DirtyRegionMixin, PipelinedRenderer):
+    pass
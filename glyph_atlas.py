@@ -0,0 +1,186 @@
+"""Draw static text from cached glyph images instead of outlines.
+
+Every glyph of a ``Text``, ``Paragraph`` or ``Code`` is a ``VMobject`` whose
+outline Cairo fills (and strokes) again on every frame it is drawn. A screen
+of code is hundreds of those.
+
+``atlas_text(mobject)`` opts the glyphs of the text in a mobject (and in its
+copies) in; other members, like the background of a ``Code``, are drawn as
+before. Once ``install()`` has patched ``Camera.display_vectorized``, such a
+glyph is drawn from the ``GlyphAtlas``: the first time its shape, style and
+zoom are seen unchanged from one frame to the next, the glyph is drawn once
+into a small image for the current zoom and sub-pixel offset (a quarter
+pixel in each direction), and from then on that image is painted at the
+glyph's position, for every other copy of the same glyph in the same style
+too. Glyphs whose shape, style or zoom changes between frames, like those
+being written or faded in or under a zooming camera, are drawn as outlines
+until they settle, so animations look exactly as before.
+
+The atlas keeps each glyph image as its own Cairo surface, since Cairo
+paints from any surface equally fast; it holds at most ``MAX_GLYPHS`` of
+them and drops the least recently used ones. Set ``RENDER_TEXT_ATLAS=0`` to
+draw every glyph as an outline.
+"""
+import math
+import os
+from collections import OrderedDict
+
+import cairo
+import numpy as np
+from manim import Camera, MarkupText, Paragraph, Text, config
+
+from dirty_region import MITER_MARGIN
+
+MAX_GLYPHS = 4096
+SUBPIXELS = 4
+# Room for antialiasing and strokes around the points of a glyph.
+PADDING = 2
+STYLE_ATTRS = [
+    "fill_rgbas",
+    "stroke_rgbas",
+    "background_stroke_rgbas",
+    "stroke_width",
+    "background_stroke_width",
+    "sheen_factor",
+    "sheen_direction",
+]
+
+
+def is_enabled():
+    return os.environ.get("RENDER_TEXT_ATLAS", "1") != "0"
+
+
+def atlas_text(mobject):
+    """Draw the glyphs of ``mobject``, and of its copies, from the atlas."""
+    for text in mobject.get_family():
+        if isinstance(text, (Text, MarkupText, Paragraph)):
+            for mob in text.family_members_with_points():
+                mob._glyph_atlas = True
+    return mobject
+
+
+def _get_state(vmobject):
+    points = vmobject.points
+    shape = np.round(points - points[0], 5).tobytes()
+    style = b"".join(
+        np.asarray(getattr(vmobject, attr), float).tobytes() for attr in STYLE_ATTRS
+    )
+    return shape, style
+
+
+class GlyphAtlas:
+    def __init__(self, max_glyphs=MAX_GLYPHS):
+        self.max_glyphs = max_glyphs
+        self._glyphs = OrderedDict()
+        # The state and transform each glyph, by id, was last drawn in.
+        self._states = {}
+
+    def clear(self):
+        self._glyphs.clear()
+        self._states.clear()
+
+    def draw(self, camera, vmobject, ctx):
+        """Paint ``vmobject`` from the atlas; return False to draw its outline."""
+        points = vmobject.points
+        if len(points) == 0 or vmobject.get_background_image() is not None:
+            return False
+        xx, yx, xy, yy, x0, y0 = ctx.get_matrix()
+        if xy or yx:
+            return False
+        state = _get_state(vmobject)
+        transform = (xx, yy, camera.cairo_line_width_multiple, camera.frame_width)
+        previous = self._states.get(id(vmobject))
+        if len(self._states) > 16 * self.max_glyphs:
+            self._states.clear()
+        self._states[id(vmobject)] = (state, transform)
+
+        origin_x = xx * points[0][0] + x0
+        origin_y = yy * points[0][1] + y0
+        base_x = math.floor(origin_x)
+        base_y = math.floor(origin_y)
+        frac_x = round((origin_x - base_x) * SUBPIXELS) / SUBPIXELS
+        frac_y = round((origin_y - base_y) * SUBPIXELS) / SUBPIXELS
+        key = (*transform, frac_x, frac_y, *state)
+        glyph = self._glyphs.get(key)
+        if glyph is None:
+            if (state, transform) != previous:
+                # Changing, e.g. being written or zoomed into: not worth an
+                # image yet.
+                return False
+            glyph = self._rasterize(camera, vmobject, xx, yy, frac_x, frac_y)
+            self._glyphs[key] = glyph
+            if len(self._glyphs) > self.max_glyphs:
+                self._glyphs.popitem(last=False)
+        else:
+            self._glyphs.move_to_end(key)
+        surface, offset_x, offset_y = glyph
+        ctx.save()
+        ctx.identity_matrix()
+        ctx.set_source_surface(surface, base_x + offset_x, base_y + offset_y)
+        ctx.paint()
+        ctx.restore()
+        return True
+
+    def _rasterize(self, camera, vmobject, xx, yy, frac_x, frac_y):
+        """Draw ``vmobject`` into its own surface.
+
+        Returns the surface and the offset of its corner from the pixel the
+        glyph's first point falls in.
+        """
+        points = vmobject.points
+        relative = points[:, :2] - points[0, :2]
+        xs = xx * relative[:, 0]
+        ys = yy * relative[:, 1]
+        width = max(
+            np.max(vmobject.stroke_width, initial=0),
+            np.max(vmobject.background_stroke_width, initial=0),
+        )
+        padding = PADDING + math.ceil(
+            MITER_MARGIN
+            * width
+            * camera.cairo_line_width_multiple
+            * max(1, config.frame_width / camera.frame_width)
+            * abs(xx)
+        )
+        left = math.floor(xs.min()) - padding
+        top = math.floor(ys.min()) - padding
+        surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32,
+            math.ceil(xs.max()) - left + padding + 1,
+            math.ceil(ys.max()) - top + padding + 1,
+        )
+        ctx = cairo.Context(surface)
+        # The camera's transform, with the first point at the same sub-pixel
+        # offset as on screen.
+        ctx.set_matrix(
+            cairo.Matrix(
+                xx,
+                0,
+                0,
+                yy,
+                frac_x - left - xx * points[0][0],
+                frac_y - top - yy * points[0][1],
+            )
+        )
+        _original_display_vectorized(camera, vmobject, ctx)
+        surface.flush()
+        return surface, left, top
+
+
+ATLAS = GlyphAtlas()
+
+_original_display_vectorized = Camera.display_vectorized
+
+
+def display_vectorized(self, vmobject, ctx):
+    if (
+        vmobject.__dict__.get("_glyph_atlas")
+        and is_enabled()
+        and ATLAS.draw(self, vmobject, ctx)
+    ):
+        return self
+    return _original_display_vectorized(self, vmobject, ctx)
+
+
+def install():
+    Camera.display_vectorized = display_vectorized
@@ -0,0 +1,186 @@
+"""Copy-on-write point data for repeated mobjects.
+
+``instanced(mobject)`` moves the points of every member of the mobject's
+family into a read-only ``SharedPoints`` buffer and makes the members
+``InstancedMobject``s. Copies of an instanced mobject share that buffer
+instead of duplicating it, and each instance only stores a per-axis scale
+and an offset. ``shift`` and ``scale`` (and so ``move_to``, ``next_to``,
+``arrange``, ``set(width=...)``, ...) update that transform, and bounding
+boxes are computed from the bounds of the shared buffer, so laying out many
+copies never touches their points.
+
+Reading ``points`` gives the instance a private, writable copy of its
+points with the transform applied, once; from then on it behaves like any
+other mobject, including for in-place writes and transformations such as
+``rotate`` or ``stretch``. Only instanced mobjects are affected: a plain
+container of instanced copies transforms its members through their points,
+so every group that lays them out has to be instanced too, with
+``instanced(group, members=False)`` when it also holds other mobjects.
+
+The transform is a per-axis scale and an offset rather than a full matrix:
+that is all layout needs, and anything that would need more gets its own
+points anyway.
+"""
+import operator as op
+from functools import reduce
+
+import numpy as np
+from manim import ORIGIN, Mobject
+
+
+class SharedPoints:
+    """Read-only points shared by the copies of an instanced mobject."""
+
+    def __init__(self, points):
+        points = np.array(points, dtype=float)
+        points.flags.writeable = False
+        self.points = points
+        if len(points):
+            self.lower = points.min(axis=0)
+            self.upper = points.max(axis=0)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __len__(self):
+        return len(self.points)
+
+
+class InstancedMobject:
+    @property
+    def points(self):
+        if self.is_shared():
+            self.materialize()
+        return self.__dict__["_points"]
+
+    @points.setter
+    def points(self, points):
+        self.__dict__["_shared"] = None
+        self.__dict__["_points"] = points
+
+    def is_shared(self):
+        return self.__dict__["_shared"] is not None
+
+    def materialize(self):
+        """Give this instance its own writable copy of its points."""
+        shared = self.__dict__["_shared"]
+        if shared is not None:
+            self.points = shared.points * self._scale + self._offset
+        return self
+
+    def get_num_points(self):
+        if self.is_shared():
+            return len(self.__dict__["_shared"])
+        return super().get_num_points()
+
+    def _get_bounds(self):
+        """Return the lower and upper corners of the family's points."""
+        lower = []
+        upper = []
+        for mob in self.family_members_with_points():
+            if isinstance(mob, InstancedMobject) and mob.is_shared():
+                shared = mob.__dict__["_shared"]
+                ends = (
+                    shared.lower * mob._scale + mob._offset,
+                    shared.upper * mob._scale + mob._offset,
+                )
+                # A negative scale flips the bounds.
+                lower.append(np.minimum(*ends))
+                upper.append(np.maximum(*ends))
+            else:
+                lower.append(mob.points.min(axis=0))
+                upper.append(mob.points.max(axis=0))
+        if not lower:
+            return None
+        return np.min(lower, axis=0), np.max(upper, axis=0)
+
+    def get_critical_point(self, direction):
+        bounds = self._get_bounds()
+        if bounds is None:
+            return np.zeros(self.dim)
+        lower, upper = bounds
+        # The same extremum per axis as Mobject.get_extremum_along_dim.
+        return np.where(
+            np.asarray(direction) < 0,
+            lower,
+            np.where(np.asarray(direction) > 0, upper, (lower + upper) / 2),
+        )
+
+    def length_over_dim(self, dim):
+        bounds = self._get_bounds()
+        if bounds is None:
+            return 0
+        return bounds[1][dim] - bounds[0][dim]
+
+    def shift(self, *vectors):
+        total_vector = reduce(op.add, vectors)
+        for mob in self.family_members_with_points():
+            if isinstance(mob, InstancedMobject) and mob.is_shared():
+                mob._offset = mob._offset + total_vector
+            else:
+                mob.points = mob.points + total_vector
+        return self
+
+    def scale(self, scale_factor, **kwargs):
+        # Tell apply_points_function_about_point that the function it gets
+        # is a scaling by scale_factor, so that it can defer it.
+        self.__dict__["_pending_scale_factor"] = scale_factor
+        try:
+            return super().scale(scale_factor, **kwargs)
+        finally:
+            self.__dict__.pop("_pending_scale_factor", None)
+
+    def apply_points_function_about_point(
+        self, func, about_point=None, about_edge=None
+    ):
+        scale_factor = self.__dict__.pop("_pending_scale_factor", None)
+        if about_point is None:
+            if about_edge is None:
+                about_edge = ORIGIN
+            about_point = self.get_critical_point(about_edge)
+        for mob in self.family_members_with_points():
+            if (
+                scale_factor is not None
+                and isinstance(mob, InstancedMobject)
+                and mob.is_shared()
+            ):
+                mob._scale = mob._scale * scale_factor
+                mob._offset = (mob._offset - about_point) * scale_factor + about_point
+            else:
+                mob.points = func(mob.points - about_point) + about_point
+        return self
+
+
+_instanced_classes = {}
+
+
+def get_instanced_class(cls):
+    if issubclass(cls, InstancedMobject):
+        return cls
+    if cls not in _instanced_classes:
+        _instanced_classes[cls] = type(
+            f"Instanced{cls.__name__}", (InstancedMobject, cls), {}
+        )
+    return _instanced_classes[cls]
+
+
+def instanced(mobject, members=True):
+    """Share the points of ``mobject``'s family with all its future copies.
+
+    With ``members=False`` only ``mobject`` itself is made instanced: a
+    group around instanced copies and other mobjects, which then shifts and
+    scales the copies through their transform.
+    """
+    family = mobject.get_family() if members else [mobject]
+    for mob in family:
+        if isinstance(mob, InstancedMobject):
+            # Already shared, e.g. a copy put into an instanced group.
+            continue
+        points = mob.points
+        mob.__class__ = get_instanced_class(type(mob))
+        mob.__dict__.pop("points", None)
+        mob._scale = np.ones(mob.dim)
+        mob._offset = np.zeros(mob.dim)
+        mob.__dict__["_shared"] = SharedPoints(points)
+        mob.__dict__["_points"] = None
+    return mobject
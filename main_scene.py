@@ -1,15 +1,35 @@
+import functools
+
 from manim import *
 from manim_speech import VoiceoverScene
-from manim_speech.interfaces.gtts import GTTSSpeechSynthesizer
-from manim_speech.interfaces.azure import AzureSpeechSynthesizer
+
+import dirty_region
+import glyph_atlas
+import multi_output
+import pipeline
+import tex_cache
+from batching import BatchedAnimationMixin
+from block_cache import BlockCacheMixin
+from checkpoint import CheckpointMixin
+from dirty_region import DirtyRegionRenderer
+from glyph_atlas import atlas_text
+from instancing import instanced
+from pipeline import PipelinedRenderer
+from snapshot import SnapshotImageMobject, take_snapshot
+from speech import get_speech_synthesizer
+from timeline import TimelineMixin
+from waveform import SoundTrack
+
+glyph_atlas.install()
+tex_cache.install()
 
 GLOBAL_SPEED = 1.05
 
-# SPEECH_SYNTHESIZER = GTTSSpeechSynthesizer()
-SPEECH_SYNTHESIZER = AzureSpeechSynthesizer(
-    voice="en-US-AriaNeural",
-    style="newscast-casual",
+# Set SPEECH_BACKEND=gtts or SPEECH_BACKEND=offline to use another backend.
+SPEECH_SYNTHESIZER = get_speech_synthesizer(
+    "azure",
     global_speed=GLOBAL_SPEED,
+    azure={"voice": "en-US-AriaNeural", "style": "newscast-casual"},
 )
 
 
@@ -22,15 +42,30 @@ class GrowFromSide(Animation):
             self.edge_dim = "height"
         super().__init__(mobject, rate_func=rate_func, **kwargs)
 
+    def begin(self):
+        # Every frame is a stretch along one axis that pins the starting
+        # edge, so cache the starting coordinates along that axis (relative
+        # to the edge) in one array whose columns the family's points view.
+        dim = self.get_dim(self.edge)
+        family = self.mobject.family_members_with_points()
+        self.end_val = getattr(self.mobject, self.edge_dim)
+        self.edge_val = self.mobject.get_critical_point(self.edge)[dim]
+        buffer = np.concatenate([mob.points for mob in family] + [np.zeros((0, 3))])
+        start = 0
+        for mob in family:
+            mob.points = buffer[start : start + len(mob.points)]
+            start += len(mob.points)
+        self.stretch_column = buffer[:, dim]
+        self.start_offsets = self.stretch_column - self.edge_val
+        super().begin()
+
     def interpolate_mobject(self, alpha: float):
-        self.mobject.become(self.starting_mobject)
-        end_val = getattr(self.mobject, self.edge_dim)
+        if self.end_val == 0:
+            return
         dx = self.rate_func(alpha)
-        interpolate_dim = interpolate(0.0001, end_val, dx)
-        self.mobject.rescale_to_fit(
-            interpolate_dim, self.get_dim(self.edge), stretch=True
-        )
-        self.mobject.align_to(self.starting_mobject, self.edge)
+        factor = interpolate(0.0001, self.end_val, dx) / self.end_val
+        np.multiply(self.start_offsets, factor, out=self.stretch_column)
+        self.stretch_column += self.edge_val
 
     def get_dim(self, dim):
         if dim[0] != 0:
@@ -38,31 +73,223 @@ class GrowFromSide(Animation):
         return 1
 
 
+class WaveEngine:
+    """Evaluates the harmonic sum of ``Wave`` for many phases at once.
+
+    The per-harmonic amplitudes, time frequencies and spatial terms are
+    computed once per configuration; use ``get_wave_engine`` to share them.
+    """
+
+    def __init__(self, amp=6, ov=12, num_p=2, l=3, Dt=0.1):
+        k = np.arange(ov)
+        mult = (num_p + k) * np.pi
+        self.x = np.arange(0, l + Dt, Dt)
+        self.freqs = (2 * mult)[:, np.newaxis]
+        self.spatial = (amp / ((k + 1) ** 2.5))[:, np.newaxis] * np.sin(
+            np.outer(k * mult, self.x)
+        )
+        self._handles = None
+
+    def __deepcopy__(self, memo):
+        # Engines are immutable and shared between every Wave with the same
+        # configuration, so copies of a Wave keep pointing at the same one.
+        return self
+
+    def evaluate(self, t_offsets):
+        """Return a (frames x samples x 3) array, one row per time offset."""
+        t_offsets = np.atleast_1d(np.asarray(t_offsets, dtype=float))
+        T = t_offsets[:, np.newaxis, np.newaxis] + self.x
+        Y = np.einsum("fkn,kn->fn", np.sin(self.freqs * T), self.spatial)
+        points = np.zeros((len(t_offsets), len(self.x), 3))
+        points[:, :, 0] = self.x
+        points[:, :, 1] = Y
+        return points
+
+    def evaluate_into(self, t_offset, phase, out):
+        """Write the y values for one time offset into ``out``.
+
+        ``phase`` is a (harmonics x samples) scratch buffer; nothing is
+        allocated.
+        """
+        np.add(t_offset, self.x, out=out)
+        np.multiply(self.freqs, out, out=phase)
+        np.sin(phase, out=phase)
+        np.multiply(phase, self.spatial, out=phase)
+        np.sum(phase, axis=0, out=out)
+        return out
+
+    def get_handle_operator(self):
+        """Return a (2 x curves x samples) matrix mapping anchor heights to
+        the heights of the two smooth bezier handles of every curve.
+
+        The sample x values never change, so the handles that
+        ``set_points_smoothly`` solves for are a fixed linear function of
+        the anchor heights. The operator is built once by smoothing unit
+        impulses.
+        """
+        if self._handles is None:
+            n = len(self.x)
+            probe = VMobject()
+            nppcc = probe.n_points_per_cubic_curve
+            anchors = np.zeros((n, 3))
+            anchors[:, 0] = self.x
+            handles = np.zeros((2, n - 1, n))
+            for j in range(n):
+                anchors[:, 1] = 0
+                anchors[j, 1] = 1
+                points = probe.set_points_smoothly(anchors).points
+                handles[0, :, j] = points[1::nppcc, 1]
+                handles[1, :, j] = points[2::nppcc, 1]
+            self._handles = handles
+        return self._handles
+
+
+@functools.lru_cache(maxsize=None)
+def get_wave_engine(amp=6, ov=12, num_p=2, l=3, Dt=0.1):
+    return WaveEngine(amp=amp, ov=ov, num_p=num_p, l=l, Dt=Dt)
+
+
 class Wave(VMobject):
-    def __init__(self, amp=6, ov=12, num_p=2, l=3, t_offset=0, Dt=0.1, **kwargs):
-        def _func(x, t):
-            return sum(
-                [
-                    (amp / ((k + 1) ** 2.5))
-                    * np.sin(2 * mult * t)
-                    * np.sin(k * mult * x)
-                    for k in range(ov)
-                    for mult in [(num_p + k) * np.pi]
-                ]
-            )
+    # Set by _bind_buffers.
+    _BOUND_ATTRS = ("_bound_points", "_phase", "_y", "_handle_y", "_columns")
 
-        self.func = _func
+    def __init__(self, amp=6, ov=12, num_p=2, l=3, t_offset=0, Dt=0.1, **kwargs):
+        self.engine = get_wave_engine(amp, ov, num_p, l, Dt)
         self.t_offset = t_offset
         self._l = l
         self._Dt = Dt
         super().__init__(**kwargs)
 
     def generate_points(self):
-        T = np.arange(self.t_offset, self.t_offset + self._l + self._Dt, self._Dt)
-        X = np.arange(0, self._l + self._Dt, self._Dt)
-        Y = np.array([self.func(x, t) for x, t in zip(X, T)])
-        Z = np.zeros(len(Y))
-        self.set_points_smoothly(list(zip(X, Y, Z)))
+        self.set_points_smoothly(self.engine.evaluate(self.t_offset)[0])
+
+    def __deepcopy__(self, memo):
+        # The bound buffers are views into this wave's points; a copy, also
+        # one made as part of a group, binds its own on first use.
+        bound = {
+            key: self.__dict__.pop(key)
+            for key in Wave._BOUND_ATTRS
+            if key in self.__dict__
+        }
+        try:
+            return super().__deepcopy__(memo)
+        finally:
+            self.__dict__.update(bound)
+
+    def _bind_buffers(self):
+        engine = self.engine
+        n = len(engine.x)
+        points = self.points
+        nppcc = self.n_points_per_cubic_curve
+        self._phase = np.empty(engine.spatial.shape)
+        self._y = np.empty(n)
+        self._handle_y = np.empty((2, n - 1))
+        self._columns = (
+            (points[0::nppcc, 1], self._y[:-1]),
+            (points[1::nppcc, 1], self._handle_y[0]),
+            (points[2::nppcc, 1], self._handle_y[1]),
+            (points[nppcc - 1 :: nppcc, 1], self._y[1:]),
+        )
+        self._bound_points = points
+
+    def set_t_offset(self, t_offset):
+        """Move the wave to ``t_offset`` by rewriting the existing points.
+
+        The current scale and position are read off the point buffer itself
+        (the first anchor always sits on the baseline and the samples span
+        the full width), so whatever transform was applied to the wave is
+        kept. Scratch buffers and views into the points are bound once per
+        point array, so steady-state calls allocate no mobjects or arrays.
+        """
+        self.engine.evaluate_into(t_offset, self._phase, self._get_heights())
+        self._write_heights()
+        self.t_offset = t_offset
+        return self
+
+    def _get_heights(self):
+        """Return the buffer of anchor heights, bound to the current points."""
+        if getattr(self, "_bound_points", None) is not self.points:
+            self._bind_buffers()
+        return self._y
+
+    def _write_heights(self):
+        """Rewrite the points from the anchor heights in ``_get_heights()``."""
+        engine = self.engine
+        points = self.points
+        scale = (points[-1, 0] - points[0, 0]) / (engine.x[-1] - engine.x[0])
+        base = points[0, 1]
+        np.matmul(engine.get_handle_operator(), self._y, out=self._handle_y)
+        for column, values in self._columns:
+            np.multiply(values, scale, out=column)
+            column += base
+
+    @staticmethod
+    def get_phase_updater(speed=0.2):
+        def updater(mob, dt):
+            mob.set_t_offset(mob.t_offset + dt * speed)
+
+        return updater
+
+
+class AudioWave(Wave):
+    """A ``Wave`` that shows the loudness of a scene's sound track.
+
+    This is a loudness display, not the audio's waveform: the anchors sample
+    the envelope of the last ``window`` seconds of ``track`` (a
+    ``waveform.SoundTrack``), the newest on the right, with alternating signs
+    so the curve swings like the wave it replaces. Every frame only indexes
+    the precomputed envelopes of the sounds; nothing is decoded. While the
+    track is silent throughout, as with the offline speech backend, it moves
+    like a ``Wave`` with the phase speed ``fallback_speed`` instead.
+    """
+
+    def __init__(
+        self, track, window=1.5, amp=1.5, l=3, Dt=0.1, fallback_speed=0.2, **kwargs
+    ):
+        self.track = track
+        self.audio_time = 0
+        self.fallback_speed = fallback_speed
+        x = get_wave_engine(l=l, Dt=Dt).x
+        self._lags = window * (1 - x / x[-1])
+        self._signs = amp * (-1.0) ** np.arange(len(x))
+        # The first anchor stays on the baseline, like that of a Wave.
+        self._signs[0] = 0
+        self._times = np.empty(len(x))
+        super().__init__(l=l, Dt=Dt, **kwargs)
+
+    def _sample(self, time, out):
+        np.subtract(time, self._lags, out=self._times)
+        self.track.sample(self._times, out)
+        out *= self._signs
+        return out
+
+    def generate_points(self):
+        if self.track.is_silent():
+            super().generate_points()
+            return
+        anchors = np.zeros((len(self.engine.x), 3))
+        anchors[:, 0] = self.engine.x
+        self._sample(self.audio_time, anchors[:, 1])
+        self.set_points_smoothly(anchors)
+
+    def set_audio_time(self, time):
+        """Show the sound track up to ``time`` seconds into the scene."""
+        if self.track.is_silent():
+            self.set_t_offset(
+                self.t_offset + (time - self.audio_time) * self.fallback_speed
+            )
+        else:
+            self._sample(time, self._get_heights())
+            self._write_heights()
+        self.audio_time = time
+        return self
+
+    @staticmethod
+    def get_audio_updater(scene):
+        def updater(mob):
+            mob.set_audio_time(scene.renderer.time)
+
+        return updater
 
 
 class StyleRectangle(VMobject):
@@ -110,42 +337,89 @@ _CODE1 = """class Scene1(MovingCameraScene):
 """
 
 
-class Scene1(VoiceoverScene, MovingCameraScene):
+class ProductionScene(
+    CheckpointMixin,
+    BlockCacheMixin,
+    TimelineMixin,
+    BatchedAnimationMixin,
+    VoiceoverScene,
+    MovingCameraScene,
+):
+    sections = []
+
+    def __init__(
+        self, renderer=None, camera_class=MovingCamera, skip_animations=False, **kwargs
+    ):
+        if renderer is None and pipeline.is_enabled():
+            if multi_output.is_enabled():
+                renderer_class = multi_output.get_renderer_class(
+                    dirty_region.is_enabled()
+                )
+            elif dirty_region.is_enabled():
+                renderer_class = DirtyRegionRenderer
+            else:
+                renderer_class = PipelinedRenderer
+            renderer = renderer_class(
+                camera_class=camera_class, skip_animations=skip_animations
+            )
+        self.sound_track = SoundTrack()
+        super().__init__(
+            renderer=renderer,
+            camera_class=camera_class,
+            skip_animations=skip_animations,
+            **kwargs,
+        )
+
+    def add_sound(self, sound_file, time_offset=0, gain=None, **kwargs):
+        # Kept even when animations are skipped, for the AudioWaves.
+        self.sound_track.add(sound_file, self.renderer.time + time_offset)
+        super().add_sound(sound_file, time_offset, gain, **kwargs)
+
     def setup(self):
         MovingCameraScene.setup(self)
+        tex_cache.prepare_tex(tex_cache.collect_tex(type(self)))
 
     def construct(self):
         self.set_speech_synthesizer(SPEECH_SYNTHESIZER)
-        self.sub1()
-        self.sub2()
+        for section in self.sections:
+            getattr(self, section)()
+
+    def get_screenshot(self):
+        return SnapshotImageMobject(take_snapshot(self.camera), camera=self.camera)
+
+
+class Scene1(ProductionScene):
+    sections = ["sub1", "sub2"]
 
     def sub2(self):
         def get_recs(title, color=GREEN):
             t = Tex(title, color=color)
-            stroke_rec = Rectangle(
-                width=3,
-                height=1,
-                fill_opacity=0,
-                color=color,
-                stroke_width=4,
-                stroke_color=color,
-            )
-            stroke_recs = VGroup(*[stroke_rec.copy() for _ in range(3)]).arrange(
-                RIGHT, buff=0
+            stroke_rec = instanced(
+                Rectangle(
+                    width=3,
+                    height=1,
+                    fill_opacity=0,
+                    color=color,
+                    stroke_width=4,
+                    stroke_color=color,
+                )
             )
+            stroke_recs = instanced(
+                VGroup(*[stroke_rec.copy() for _ in range(3)])
+            ).arrange(RIGHT, buff=0)
             fill_recs = stroke_recs.copy()
             fill_recs.set_style(
                 fill_opacity=1, fill_color=color, stroke_width=0, stroke_opacity=0
             )
             t.next_to(stroke_recs, LEFT, buff=0.3)
             line = Line(fill_recs.get_corner(DL), fill_recs.get_corner(DR))
-            return line, VGroup(t, stroke_recs, fill_recs)
+            return line, instanced(VGroup(t, stroke_recs, fill_recs), members=False)
 
         vl, video_recs = get_recs("Video", GREEN)
         al, audio_recs = get_recs("Audio", BLUE)
 
         main_grp = (
-            VGroup(video_recs, audio_recs)
+            instanced(VGroup(video_recs, audio_recs), members=False)
             .arrange(DOWN, aligned_edge=RIGHT)
             .shift(UP + LEFT * 0.4)
         )
@@ -247,14 +521,7 @@ class Scene1(VoiceoverScene, MovingCameraScene):
         ).arrange(DOWN, buff=0.5)
         title.set(width=config.frame_width - 3).to_edge(UP, buff=1.5)
 
-        def updater_wave(mob, dt):
-            t_offset = mob.t_offset + dt * 0.2
-            center = mob.get_center()
-            width = mob.width
-            mob.become(Wave(t_offset=t_offset))
-            mob.t_offset = t_offset
-            mob.width = width
-            mob.move_to(center)
+        updater_wave = AudioWave.get_audio_updater(self)
 
         with self.voiceover(
             text="Welcome to Manim Video Production one-oh-one"
@@ -270,7 +537,7 @@ In this tutorial, we will teach you how to write a screenplay and create a story
             self.play(Write(title[1]))
         self.wait()
 
-        screen_im = ImageMobject(self.camera.get_image())
+        screen_im = self.get_screenshot()
         screen_im.width = config.frame_width
         bk = Rectangle().surround(screen_im, buff=0.2, stretch=True)
         bk.set_style(
@@ -290,14 +557,14 @@ In this tutorial, we will teach you how to write a screenplay and create a story
                 run_time=3,
             )
             self.wait(2.5)
-            code = Code(
-                code=_CODE1, language="python", style="monokai", font="Consolas"
+            code = atlas_text(
+                Code(code=_CODE1, language="python", style="monokai", font="Consolas")
             )
 
             _GRP = (
                 Group(
                     MathTex("="),
-                    Wave().set(width=screen_grp.width),
+                    AudioWave(self.sound_track).set(width=screen_grp.width),
                     MathTex("+"),
                     code.set(width=screen_grp.width),
                 )
@@ -313,7 +580,7 @@ In this tutorial, we will teach you how to write a screenplay and create a story
             )
             # self.wait(tracker.duration - 0.3 - 2.4 - 1 - 3.8 - 1.8)
 
-        self.save_screen = ImageMobject(self.camera.get_image())
+        self.save_screen = self.get_screenshot()
 
         bk = Rectangle(width=16, height=9, color=BLACK, fill_opacity=1).set(
             width=config.frame_width
@@ -327,14 +594,8 @@ In this tutorial, we will teach you how to write a screenplay and create a story
         self.remove(*self.mobjects)
 
 
-class Scene2(VoiceoverScene, MovingCameraScene):
-    def setup(self):
-        MovingCameraScene.setup(self)
-
-    def construct(self):
-        self.set_speech_synthesizer(SPEECH_SYNTHESIZER)
-        self.sub1()
-        self.sub2()
+class Scene2(ProductionScene):
+    sections = ["sub1", "sub2"]
 
     def sub1(self):
         title = Tex(r"\sf Screenplay", " = ", "Voiceover Text + Verbal Descriptions")
@@ -356,7 +617,7 @@ class Scene2(VoiceoverScene, MovingCameraScene):
             .shift(UP * 0.7)
         )
 
-        _BOX = StyleRectangle(tex_boxes[0])
+        _BOX = instanced(StyleRectangle(tex_boxes[0]))
         _BOXES = VGroup(*[_BOX.copy().move_to(t) for t in tex_boxes])
 
         _ZIP = list(zip(tex_boxes, _BOXES))
@@ -478,8 +739,9 @@ implementing the """,
         )
         _UP_TEXT.width = config.frame_width - 3
         _UP_TEXT.to_edge(UP, buff=1)
-        _DOWN_TEXT = Paragraph(
-            """ [1]  =    [2]     +    [3]
+        _DOWN_TEXT = atlas_text(
+            Paragraph(
+                """ [1]  =    [2]     +    [3]
 video   recording    manim code
 
 ---------------------------
@@ -491,9 +753,10 @@ video   recording    manim code
     audio that is playing at that moment (see below)
 [3] is the manim code that generates this scene
 """,
-            font="Consolas",
-            line_spacing=1,
-        ).scale(0.29)
+                font="Consolas",
+                line_spacing=1,
+            ).scale(0.29)
+        )
         _DOWN_TEXT.to_edge(DOWN, buff=1)
         bk = Rectangle().surround(_DOWN_TEXT, stretch=True, buff=0.6)
         # self.add(_UP_TEXT,_DOWN_TEXT,bk)
@@ -542,10 +805,12 @@ video   recording    manim code
             self.wait(2)
             group1 = VGroup(
                 Tex("Theorem of Beethoven", font_size=72),
-                Text(
-                    "https://www.youtube.com/c/TheoremofBeethoven",
-                    font="Consolas",
-                    font_size=24,
+                atlas_text(
+                    Text(
+                        "https://www.youtube.com/c/TheoremofBeethoven",
+                        font="Consolas",
+                        font_size=24,
+                    )
                 ),
             ).arrange(DOWN, buff=0.5)
             self.play(FadeIn(group1))
@@ -558,16 +823,18 @@ video   recording    manim code
             self.wait(1.2)
             self.play(
                 Write(
-                    VGroup(
-                        Text(
-                            "Screenplay: https://hackmd.io/@prism0x/manim-screenplay-writing-storyboarding",
-                            font="Consolas",
-                        ),
-                        Text(
-                            "Code: https://github.com/MathBlocks/manim-video-prod-101",
-                            font="Consolas",
-                        ).arrange(DOWN, buff=0.5),
-                    ).set(width=config.frame_width - 2.5)
+                    atlas_text(
+                        VGroup(
+                            Text(
+                                "Screenplay: https://hackmd.io/@prism0x/manim-screenplay-writing-storyboarding",
+                                font="Consolas",
+                            ),
+                            Text(
+                                "Code: https://github.com/MathBlocks/manim-video-prod-101",
+                                font="Consolas",
+                            ).arrange(DOWN, buff=0.5),
+                        ).set(width=config.frame_width - 2.5)
+                    )
                 ),
                 run_time=1.5,
             )
@@ -1,4 +1,3 @@
-cd media/videos/main_scene/1080p60
-rm -f file_list.txt
-for f in *.mp4 ; do echo file \'$f\' >> file_list.txt; done
-ffmpeg -f concat -safe 0 -i file_list.txt -c copy ../../../../final_cut.mp4
\ No newline at end of file
+#!/bin/sh
+# Kept for existing workflows; see assemble.py.
+cd "$(dirname "$0")" && exec python3 assemble.py "$@"
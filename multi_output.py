@@ -0,0 +1,301 @@
+"""Render several output qualities from a single run of a scene.
+
+``MultiOutputRenderer`` renders the scene at the configured quality as usual
+and also feeds every extra output listed in ``RENDER_OUTPUTS`` (e.g.
+``720p30,480p15``). ``construct()``, the updaters and the voiceovers run
+once; each extra output only draws the frames it needs with its own camera,
+taking every n-th frame of the master clock (its frame rate has to divide
+the configured one), and encodes them with its own file writer and ffmpeg
+settings into its own quality directory, next to the master output.
+Those settings are for opaque mp4 files: transparent or non-mp4 renders
+cannot have extra outputs, and their master output is encoded by manim's
+own writer as usual.
+
+Manim's per-animation movie cache and the voiceover block cache only know
+about the master output, so both are bypassed for the renders of scenes
+with extra outputs. ``get_renderer_class`` puts the extra outputs on top of
+the dirty-region renderer, or of the plain pipelined one when
+``RENDER_DIRTY_REGIONS=0``.
+"""
+import os
+import subprocess
+from dataclasses import dataclass, field
+
+import numpy as np
+from manim import __version__ as manim_version
+from manim import config, logger, tempconfig
+from manim.utils.iterables import list_update
+
+from dirty_region import DirtyRegionRenderer
+from pipeline import PipelinedFileWriter, PipelinedRenderer
+
+
+@dataclass
+class OutputSpec:
+    pixel_width: int
+    pixel_height: int
+    frame_rate: int
+    ffmpeg_args: list = field(default_factory=list)
+
+    @property
+    def name(self):
+        return f"{self.pixel_height}p{self.frame_rate}"
+
+    def get_config(self):
+        return {
+            "pixel_width": self.pixel_width,
+            "pixel_height": self.pixel_height,
+            "frame_rate": self.frame_rate,
+        }
+
+
+OUTPUTS = {
+    spec.name: spec
+    for spec in [
+        OutputSpec(3840, 2160, 60, ["-crf", "18"]),
+        OutputSpec(2560, 1440, 60, ["-crf", "18"]),
+        OutputSpec(1920, 1080, 60, ["-crf", "18"]),
+        OutputSpec(1280, 720, 30, ["-crf", "20"]),
+        OutputSpec(854, 480, 15, ["-crf", "28", "-preset", "veryfast"]),
+    ]
+}
+# Calls on the master file writer that every output's writer repeats.
+FORWARDED_CALLS = [
+    "add_partial_movie_file",
+    "begin_animation",
+    "end_animation",
+    "add_sound",
+    "finish",
+]
+
+
+def is_enabled():
+    return bool(get_output_specs())
+
+
+def get_output_specs():
+    names = os.environ.get("RENDER_OUTPUTS", "").replace(",", " ").split()
+    for name in names:
+        if name not in OUTPUTS:
+            raise ValueError(
+                f"Unknown output {name!r} in RENDER_OUTPUTS, "
+                f"expected one of {', '.join(OUTPUTS)}"
+            )
+    return [OUTPUTS[name] for name in names]
+
+
+def is_supported():
+    """Whether the configured movie can be encoded with the output settings."""
+    return not config.transparent and config.movie_file_extension == ".mp4"
+
+
+def get_current_spec():
+    if not is_supported():
+        return None
+    return OUTPUTS.get(f"{config.pixel_height}p{config.frame_rate:g}")
+
+
+class OutputFileWriter(PipelinedFileWriter):
+    """A file writer that encodes with the ffmpeg settings of its output."""
+
+    def __init__(self, *args, spec=None, **kwargs):
+        self.spec = spec if spec is not None else get_current_spec()
+        super().__init__(*args, **kwargs)
+
+    def open_movie_pipe(self, file_path=None):
+        if self.spec is None:
+            return super().open_movie_pipe(file_path)
+        if file_path is None:
+            file_path = self.partial_movie_files[self.renderer.num_plays]
+        self.partial_movie_file_path = file_path
+        spec = self.spec
+        command = [
+            "ffmpeg",
+            "-y",
+            "-f",
+            "rawvideo",
+            "-s",
+            f"{spec.pixel_width}x{spec.pixel_height}",
+            "-pix_fmt",
+            "rgba",
+            "-r",
+            str(spec.frame_rate),
+            "-i",
+            "-",
+            "-an",
+            "-loglevel",
+            config.ffmpeg_loglevel.lower(),
+            "-metadata",
+            f"comment=Rendered with Manim Community v{manim_version}",
+            "-vcodec",
+            "libx264",
+            "-pix_fmt",
+            "yuv420p",
+            *spec.ffmpeg_args,
+            str(file_path),
+        ]
+        self.writing_process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def close_movie_pipe(self):
+        if self.spec is None:
+            return super().close_movie_pipe()
+        self.flush()
+        self.writing_process.stdin.close()
+        self.writing_process.wait()
+
+
+class OutputSink:
+    """One extra output: a camera, a file writer and its share of the frames."""
+
+    def __init__(self, renderer, spec, scene):
+        if config.frame_rate % spec.frame_rate:
+            raise ValueError(
+                f"Cannot render {spec.name} from {config.frame_rate:g} fps: "
+                "its frame rate has to divide the master frame rate"
+            )
+        self.spec = spec
+        self.step = int(config.frame_rate // spec.frame_rate)
+        self.camera = type(renderer.camera)(
+            pixel_width=spec.pixel_width,
+            pixel_height=spec.pixel_height,
+            frame_rate=spec.frame_rate,
+        )
+        self.static_image = None
+        with tempconfig(spec.get_config()):
+            self.file_writer = OutputFileWriter(
+                renderer, type(scene).__name__, spec=spec
+            )
+
+    def call(self, name, *args, **kwargs):
+        with tempconfig(self.spec.get_config()):
+            return getattr(self.file_writer, name)(*args, **kwargs)
+
+    def draw(self, master_camera, mobjects, static_image, **kwargs):
+        camera = self.camera
+        if hasattr(master_camera, "frame"):
+            # Follow the moving camera's frame.
+            camera.frame = master_camera.frame
+        else:
+            camera.frame_center = master_camera.frame_center
+            camera.frame_width = master_camera.frame_width
+            camera.frame_height = master_camera.frame_height
+        if static_image is not None:
+            camera.set_frame_to_background(static_image)
+        else:
+            camera.reset()
+        camera.capture_mobjects(mobjects, **kwargs)
+        return camera.pixel_array
+
+    def save_static_frame(self, master_camera, static_mobjects):
+        self.static_image = None
+        if static_mobjects:
+            self.static_image = np.array(
+                self.draw(master_camera, static_mobjects, None)
+            )
+
+    def write(self, master_camera, mobjects, kwargs, num_frames):
+        pixel_array = self.draw(master_camera, mobjects, self.static_image, **kwargs)
+        frame = self.file_writer.frame_pool.acquire(
+            pixel_array.shape, pixel_array.dtype
+        )
+        np.copyto(frame, pixel_array)
+        self.file_writer.write_frame(frame, num_frames)
+
+
+class MultiOutputMixin:
+    sinks = ()
+
+    def __init__(self, file_writer_class=OutputFileWriter, **kwargs):
+        super().__init__(file_writer_class=file_writer_class, **kwargs)
+        self._frame_index = 0
+        self._frame_mobjects = None
+
+    def init_scene(self, scene):
+        super().init_scene(scene)
+        specs = get_output_specs()
+        if config.dry_run or not config.write_to_movie:
+            specs = []
+        if specs and not is_supported():
+            raise ValueError(
+                "Extra outputs are only rendered as opaque mp4 files, "
+                "not with --transparent or another movie format"
+            )
+        master = get_current_spec()
+        self.sinks = [
+            OutputSink(self, spec, scene) for spec in specs if spec != master
+        ]
+        if not self.sinks:
+            return
+        if not config.disable_caching:
+            logger.info("Movie caching is disabled while rendering extra outputs")
+        render = scene.render
+
+        def render_without_caching(*args, **kwargs):
+            # Only for this render, not for later ones in the same process.
+            with tempconfig({"disable_caching": True}):
+                return render(*args, **kwargs)
+
+        scene.render = render_without_caching
+        for name in FORWARDED_CALLS:
+            self._forward(name)
+
+    def _forward(self, name):
+        method = getattr(self.file_writer, name)
+        sinks = self.sinks
+
+        def forward(*args, **kwargs):
+            result = method(*args, **kwargs)
+            for sink in sinks:
+                sink.call(name, *args, **kwargs)
+            return result
+
+        setattr(self.file_writer, name, forward)
+
+    def update_frame(self, scene, mobjects=None, include_submobjects=True, **kwargs):
+        if self.sinks:
+            drawn = dict(kwargs, include_submobjects=include_submobjects)
+            drawn.pop("ignore_skipping", None)
+            self._frame_mobjects = (
+                mobjects or list_update(scene.mobjects, scene.foreground_mobjects),
+                drawn,
+            )
+        return super().update_frame(
+            scene, mobjects, include_submobjects=include_submobjects, **kwargs
+        )
+
+    def save_static_frame_data(self, scene, static_mobjects):
+        result = super().save_static_frame_data(scene, static_mobjects)
+        for sink in self.sinks:
+            sink.save_static_frame(self.camera, static_mobjects)
+        return result
+
+    def add_frame(self, frame, num_frames=1):
+        skipped = self.skip_animations
+        super().add_frame(frame, num_frames)
+        if skipped or not self.sinks:
+            return
+        start = self._frame_index
+        self._frame_index += num_frames
+        mobjects, kwargs = self._frame_mobjects
+        for sink in self.sinks:
+            # The master frames in [start, start + num_frames) that fall on
+            # the sink's clock.
+            step = sink.step
+            count = -(-(start + num_frames) // step) - -(-start // step)
+            if count:
+                sink.write(self.camera, mobjects, kwargs, count)
+
+
+class MultiOutputRenderer(MultiOutputMixin, DirtyRegionRenderer):
+    pass
+
+
+class MultiOutputPipelinedRenderer(MultiOutputMixin, PipelinedRenderer):
+    pass
+
+
+def get_renderer_class(dirty_regions=True):
+    """Return the renderer with extra outputs on top of the chosen base."""
+    if dirty_regions:
+        return MultiOutputRenderer
+    return MultiOutputPipelinedRenderer
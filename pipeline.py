@@ -0,0 +1,148 @@
+"""Frame output that overlaps encoding with drawing the next frame.
+
+With the stock Cairo renderer every frame is drawn, copied out of the
+camera and written to ffmpeg's stdin before the scene moves on, and the
+write blocks until ffmpeg has consumed the whole frame. ``PipelinedRenderer``
+copies each finished frame into a buffer from a ``FramePool`` and hands it
+to a writer thread through a bounded queue, so the scene updates and draws
+the next frames while ffmpeg encodes. When the queue is full the scene
+waits (backpressure), and written buffers go back to the pool, so frames
+are not allocated anew at 1080p60.
+
+Drawing itself stays on the main thread: Cairo reads the live mobjects,
+which the next update changes. The queue is drained before every partial
+movie is closed, so the output files are identical.
+
+Set ``RENDER_PIPELINE=0`` to render with the stock renderer, and
+``RENDER_PIPELINE_DEPTH`` to change how many frames may be in flight
+(default 4).
+"""
+import os
+import queue
+import threading
+import weakref
+
+import numpy as np
+from manim import config
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.scene.scene_file_writer import SceneFileWriter
+
+PIPELINE_DEPTH = int(os.environ.get("RENDER_PIPELINE_DEPTH", 4))
+
+
+def is_enabled():
+    renderer = getattr(config.renderer, "value", config.renderer)
+    return renderer == "cairo" and os.environ.get("RENDER_PIPELINE", "1") != "0"
+
+
+class FramePool:
+    """Reusable frame buffers, handed back once every write of them is done."""
+
+    def __init__(self):
+        self._free = []
+        self._owned = weakref.WeakSet()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype):
+        with self._lock:
+            while self._free:
+                buffer = self._free.pop()
+                if buffer.shape == shape and buffer.dtype == dtype:
+                    return buffer
+        buffer = np.empty(shape, dtype)
+        self._owned.add(buffer)
+        return buffer
+
+    def retain(self, buffer):
+        with self._lock:
+            count = self._pending.get(id(buffer), (0, buffer))[0]
+            self._pending[id(buffer)] = (count + 1, buffer)
+
+    def release(self, buffer):
+        with self._lock:
+            count = self._pending.pop(id(buffer))[0]
+            if count > 1:
+                self._pending[id(buffer)] = (count - 1, buffer)
+            elif buffer in self._owned:
+                self._free.append(buffer)
+
+
+class PipelinedFileWriter(SceneFileWriter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.frame_pool = FramePool()
+        self._queue = queue.Queue(maxsize=PIPELINE_DEPTH)
+        self._thread = None
+        self._error = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            stdin, frame, num_frames = item
+            try:
+                if self._error is None:
+                    for _ in range(num_frames):
+                        self._write_frame_data(stdin, frame)
+            except Exception as e:
+                self._error = e
+            finally:
+                self.frame_pool.release(frame)
+                self._queue.task_done()
+
+    def _write_frame_data(self, stdin, frame):
+        stdin.write(np.ascontiguousarray(frame).data)
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def write_frame(self, frame_or_renderer, num_frames=1):
+        if not (
+            is_enabled() and config.write_to_movie and config.format != "png"
+        ):
+            return super().write_frame(frame_or_renderer, num_frames=num_frames)
+        self._raise_error()
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="frame-writer", daemon=True
+            )
+            self._thread.start()
+        self.frame_pool.retain(frame_or_renderer)
+        # A repeated frame, e.g. of a static wait, is queued once.
+        self._queue.put((self.writing_process.stdin, frame_or_renderer, num_frames))
+
+    def flush(self):
+        """Wait until every queued frame has been written."""
+        if self._thread is not None:
+            self._queue.join()
+        self._raise_error()
+
+    def close_movie_pipe(self):
+        self.flush()
+        super().close_movie_pipe()
+
+    def finish(self):
+        self.flush()
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        super().finish()
+
+
+class PipelinedRenderer(CairoRenderer):
+    def __init__(self, file_writer_class=PipelinedFileWriter, **kwargs):
+        super().__init__(file_writer_class=file_writer_class, **kwargs)
+
+    def get_frame(self):
+        pixel_array = self.camera.pixel_array
+        frame = self.file_writer.frame_pool.acquire(
+            pixel_array.shape, pixel_array.dtype
+        )
+        np.copyto(frame, pixel_array)
+        return frame
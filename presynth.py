@@ -0,0 +1,152 @@
+"""Synthesize every voiceover in a scene file before rendering it.
+
+The narration is collected statically from the ``self.voiceover(...)`` calls
+in each scene class, so nothing is rendered. The blocks are synthesized
+concurrently into the voiceover cache, and their durations are reported
+up front.
+
+    python presynth.py [Scene1 Scene2 ...] [--workers 8]
+"""
+import argparse
+import ast
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from speech import get_audio_duration, normalize_text
+
+
+@dataclass
+class VoiceoverBlock:
+    scene: str
+    method: str
+    lineno: int
+    text: str
+    duration: float = None
+
+
+def _get_voiceover_text(call):
+    func = call.func
+    if not (
+        isinstance(func, ast.Attribute)
+        and func.attr == "voiceover"
+        and isinstance(func.value, ast.Name)
+        and func.value.id == "self"
+    ):
+        return None
+    if call.args:
+        node = call.args[0]
+    else:
+        node = next((kw.value for kw in call.keywords if kw.arg == "text"), None)
+    if node is None:
+        return None
+    try:
+        text = ast.literal_eval(node)
+    except ValueError:
+        return None
+    return text if isinstance(text, str) else None
+
+
+def _get_methods_in_play_order(cls):
+    methods = {
+        node.name: node for node in cls.body if isinstance(node, ast.FunctionDef)
+    }
+    order = []
+    for node in cls.body:
+        if (
+            isinstance(node, ast.Assign)
+            and [getattr(target, "id", None) for target in node.targets]
+            == ["sections"]
+        ):
+            order += [name for name in ast.literal_eval(node.value) if name in methods]
+    if "construct" in methods:
+        for node in ast.walk(methods["construct"]):
+            if (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Attribute)
+                and isinstance(node.func.value, ast.Name)
+                and node.func.value.id == "self"
+                and node.func.attr in methods
+                and node.func.attr not in order
+            ):
+                order.append(node.func.attr)
+    order += [name for name in methods if name not in order]
+    return [methods[name] for name in order]
+
+
+def collect_voiceovers(path="main_scene.py", scenes=None):
+    """Return the voiceover blocks of every scene class.
+
+    Blocks are ordered by class, then by the scene's ``sections`` or the
+    order in which ``construct`` calls the methods that contain them, then
+    by line.
+    """
+    tree = ast.parse(Path(path).read_text(), filename=str(path))
+    blocks = []
+    for cls in tree.body:
+        if not isinstance(cls, ast.ClassDef):
+            continue
+        if scenes is not None and cls.name not in scenes:
+            continue
+        for method in _get_methods_in_play_order(cls):
+            calls = [
+                node for node in ast.walk(method) if isinstance(node, ast.Call)
+            ]
+            for call in sorted(calls, key=lambda node: node.lineno):
+                text = _get_voiceover_text(call)
+                if text is not None:
+                    blocks.append(
+                        VoiceoverBlock(cls.name, method.name, call.lineno, text)
+                    )
+    return blocks
+
+
+def presynthesize(blocks, synthesizer, workers=8):
+    """Synthesize ``blocks`` with a bounded thread pool, filling in durations."""
+
+    def synthesize(block):
+        result = synthesizer.synthesize_from_text(block.text)
+        duration = result.get("duration")
+        if duration is None:
+            duration = get_audio_duration(
+                Path(synthesizer.cache_dir) / result["final_audio"]
+            )
+        block.duration = duration
+        return block
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(synthesize, blocks))
+
+
+def print_report(blocks):
+    for block in blocks:
+        text = normalize_text(block.text)
+        if len(text) > 50:
+            text = text[:47] + "..."
+        print(
+            f"{block.scene}.{block.method:<6} L{block.lineno:<5}"
+            f"{block.duration:7.2f}s  {text}"
+        )
+    total = sum(block.duration for block in blocks)
+    print(f"{len(blocks)} voiceover blocks, {total:.2f}s of narration")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenes", nargs="*")
+    parser.add_argument("--file", default="main_scene.py")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    from main_scene import SPEECH_SYNTHESIZER
+
+    blocks = collect_voiceovers(args.file, args.scenes or None)
+    start = time.perf_counter()
+    presynthesize(blocks, SPEECH_SYNTHESIZER, args.workers)
+    print_report(blocks)
+    print(f"Synthesized in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
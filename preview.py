@@ -0,0 +1,173 @@
+"""Re-render the sections of ``main_scene.py`` that change, as you edit it.
+
+The preview process imports manim and the scenes once and keeps the speech,
+Tex and block caches warm. It watches ``main_scene.py``; on every save it
+reloads the module and re-renders, at preview quality, only the sections
+whose code changed. The speech synthesizer lives in ``speech``, which is
+not reloaded, so a reloaded ``main_scene`` gets the same one back, with its
+backend loaded once it was first needed:
+
+- an edited ``subN`` method re-renders that section,
+- any other change inside a scene class re-renders all of its sections,
+- a change elsewhere in the module re-renders every section.
+
+For every section it reports the time from the edit (the file's
+modification time) to the first frame written and to the finished movie.
+
+    python preview.py [Scene1 Scene2 ...] [-q l] [--all]
+"""
+import argparse
+import ast
+import importlib
+import os
+import sys
+import time
+import traceback
+from pathlib import Path
+
+from render import QUALITIES, SCENES, configure, get_scene_class
+
+SCENE_FILE = Path(__file__).with_name("main_scene.py")
+
+
+def get_code_parts(source, scenes):
+    """Split the module into comparable parts.
+
+    Methods of the scene classes are keyed ``(scene, method)``, the rest of
+    each scene class ``(scene, None)`` and the rest of the module
+    ``(None, None)``.
+    """
+    parts = {}
+    module_nodes = []
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.ClassDef) and node.name in scenes:
+            class_nodes = []
+            for item in node.body:
+                if isinstance(item, ast.FunctionDef):
+                    parts[node.name, item.name] = ast.dump(item)
+                else:
+                    class_nodes.append(item)
+            class_nodes += node.bases + node.decorator_list
+            parts[node.name, None] = ast.dump(ast.Module(class_nodes, []))
+        else:
+            module_nodes.append(node)
+    parts[None, None] = ast.dump(ast.Module(module_nodes, []))
+    return parts
+
+
+def get_changed_sections(old_parts, new_parts, scenes):
+    """Return the (scene, section) pairs that have to be rendered again."""
+    changed = {
+        key
+        for key in set(old_parts) | set(new_parts)
+        if old_parts.get(key) != new_parts.get(key)
+    }
+    main_scene = sys.modules["main_scene"]
+    sections = []
+    for scene in scenes:
+        scene_sections = getattr(main_scene, scene).sections
+        scene_changed = (None, None) in changed or (scene, None) in changed
+        for key in changed:
+            if key[0] == scene and key[1] not in scene_sections:
+                # A helper method could be used by any section.
+                scene_changed = True
+        sections += [
+            (scene, section)
+            for section in scene_sections
+            if scene_changed or (scene, section) in changed
+        ]
+    return sections
+
+
+def render_section(scene, section, edit_time):
+    scene = get_scene_class(scene, section)()
+    file_writer = scene.renderer.file_writer
+    write_frame = file_writer.write_frame
+    first_frame_time = None
+
+    def timed_write_frame(frame, *args, **kwargs):
+        nonlocal first_frame_time
+        if first_frame_time is None:
+            first_frame_time = time.time()
+        return write_frame(frame, *args, **kwargs)
+
+    file_writer.write_frame = timed_write_frame
+    scene.render()
+    done_time = time.time()
+    if first_frame_time is None:
+        first_frame = "no new frames"
+    else:
+        first_frame = f"first frame after {first_frame_time - edit_time:.2f}s"
+    print(
+        f"{type(scene).__name__}: {first_frame}, "
+        f"done after {done_time - edit_time:.2f}s -> {file_writer.movie_file_path}"
+    )
+
+
+def render_sections(sections, edit_time):
+    for scene, section in sections:
+        try:
+            render_section(scene, section, edit_time)
+        except Exception:
+            traceback.print_exc()
+
+
+def watch(scenes, interval=0.25, render_all=False):
+    import main_scene
+    import tex_cache
+
+    # Warm the Tex cache for everything the scenes use.
+    for scene in scenes:
+        tex_cache.prepare_tex(tex_cache.collect_tex(getattr(main_scene, scene)))
+    mtime = os.stat(SCENE_FILE).st_mtime
+    parts = get_code_parts(SCENE_FILE.read_text(), scenes)
+    if render_all:
+        render_sections(get_changed_sections({}, parts, scenes), time.time())
+    print(f"Watching {SCENE_FILE.name}")
+    while True:
+        time.sleep(interval)
+        try:
+            new_mtime = os.stat(SCENE_FILE).st_mtime
+        except OSError:
+            continue
+        if new_mtime == mtime:
+            continue
+        mtime = new_mtime
+        try:
+            new_parts = get_code_parts(SCENE_FILE.read_text(), scenes)
+        except SyntaxError:
+            traceback.print_exc(limit=0)
+            continue
+        if new_parts == parts:
+            continue
+        try:
+            importlib.reload(main_scene)
+            sections = get_changed_sections(parts, new_parts, scenes)
+        except Exception:
+            traceback.print_exc()
+            continue
+        parts = new_parts
+        names = ", ".join(f"{scene}.{section}" for scene, section in sections)
+        print(f"Changed: {names or 'nothing to render'}")
+        render_sections(sections, mtime)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenes", nargs="*", default=SCENES)
+    parser.add_argument("-q", "--quality", choices=QUALITIES, default="l")
+    parser.add_argument("--interval", type=float, default=0.25)
+    parser.add_argument(
+        "--all", action="store_true", help="render every section on startup"
+    )
+    args = parser.parse_args()
+
+    configure(QUALITIES[args.quality])
+    try:
+        watch(args.scenes, args.interval, args.all)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
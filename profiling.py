@@ -0,0 +1,267 @@
+"""Opt-in profiling of scene renders.
+
+``Profiler.install()`` wraps the parts of a render worth looking at in timed
+sections, and restores everything on ``uninstall()``; when it is not
+installed nothing is wrapped, so normal renders pay nothing for it. The
+sections nest as
+
+    scene:<Scene> > voiceover:<method>:<line> > play:<method>:<line>:<animations>
+        > updater:<name> / <CustomClass>.<method> / batched_interpolate
+        / rasterize[_dirty_region] / copy_frame
+
+along with wait, synthesize, tex, svg, rasterize_glyph, decode_audio and
+envelope sections wherever they happen, and encode sections on the frame
+writer thread. Each distinct stack of sections gets its call count, wall
+time, time spent in the section itself and, with ``memory=True``, the bytes
+it left allocated and its peak memory above what was in use when it started
+(measured with tracemalloc, which slows the render down noticeably).
+
+``write()`` saves the stacks as JSON and in the folded format read by
+flamegraph.pl, inferno and speedscope. ``render.py --profile DIR`` profiles
+every rendered segment.
+"""
+import functools
+import importlib
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from manim import Animation, Mobject, Scene, SVGMobject
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.scene.scene_file_writer import SceneFileWriter
+from manim_speech import VoiceoverScene
+
+import tex_cache
+import waveform
+from batching import AnimationBatch
+from dirty_region import DirtyRegionMixin
+from glyph_atlas import GlyphAtlas
+from pipeline import PipelinedFileWriter, PipelinedRenderer
+from speech import CachedSpeechSynthesizer
+from timeline import describe_animation, get_caller
+
+
+class _Section:
+    __slots__ = ("key", "start", "child_time", "memory_start", "peak")
+
+    def __init__(self, key, memory_start):
+        self.key = key
+        self.start = time.perf_counter()
+        self.child_time = 0.0
+        self.memory_start = memory_start
+        self.peak = memory_start
+
+
+class Profiler:
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.stats = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._patches = []
+        self._tracing = False
+
+    def _get_stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def enter(self, name):
+        stack = self._get_stack()
+        key = stack[-1].key + (name,) if stack else (name,)
+        memory_start = 0
+        if self.memory:
+            memory_start, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+        stack.append(_Section(key, memory_start))
+
+    def exit(self):
+        stack = self._get_stack()
+        section = stack.pop()
+        wall = time.perf_counter() - section.start
+        allocated = peak = 0
+        if self.memory:
+            current, traced_peak = tracemalloc.get_traced_memory()
+            section.peak = max(section.peak, traced_peak)
+            allocated = current - section.memory_start
+            peak = section.peak - section.memory_start
+        if stack:
+            stack[-1].child_time += wall
+            stack[-1].peak = max(stack[-1].peak, section.peak)
+        with self._lock:
+            stats = self.stats.get(section.key)
+            if stats is None:
+                stats = self.stats[section.key] = {
+                    "calls": 0,
+                    "wall": 0.0,
+                    "self": 0.0,
+                    "allocated": 0,
+                    "peak": 0,
+                }
+            stats["calls"] += 1
+            stats["wall"] += wall
+            stats["self"] += wall - section.child_time
+            stats["allocated"] += allocated
+            stats["peak"] = max(stats["peak"], peak)
+
+    @contextmanager
+    def section(self, name):
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def wrap(self, func, name):
+        """Return ``func`` timed as a section called ``name``."""
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self.enter(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.exit()
+
+        return wrapper
+
+    def _patch(self, owner, attr, value):
+        self._patches.append((owner, attr, owner.__dict__[attr]))
+        setattr(owner, attr, value)
+
+    def _patch_method(self, owner, attr, name):
+        self._patch(owner, attr, self.wrap(owner.__dict__[attr], name))
+
+    def install(self, scene_module="main_scene"):
+        """Instrument manim and the classes defined in ``scene_module``."""
+        if self._patches:
+            return self
+        self._tracing = self.memory and not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        profiler = self
+
+        original_play = Scene.__dict__["play"]
+        original_wait = Scene.__dict__["wait"]
+        original_voiceover = VoiceoverScene.__dict__["voiceover"]
+        original_add_updater = Mobject.__dict__["add_updater"]
+        original_remove_updater = Mobject.__dict__["remove_updater"]
+
+        def play(scene, *args, **kwargs):
+            method, lineno = get_caller()
+            animations = "+".join(describe_animation(animation) for animation in args)
+            profiler.enter(f"play:{method}:{lineno}:{animations}")
+            try:
+                return original_play(scene, *args, **kwargs)
+            finally:
+                profiler.exit()
+
+        def wait(scene, *args, **kwargs):
+            method, lineno = get_caller()
+            profiler.enter(f"wait:{method}:{lineno}")
+            try:
+                return original_wait(scene, *args, **kwargs)
+            finally:
+                profiler.exit()
+
+        @contextmanager
+        def voiceover(scene, *args, **kwargs):
+            method, lineno = get_caller()
+            with profiler.section(f"voiceover:{method}:{lineno}"):
+                with original_voiceover(scene, *args, **kwargs) as tracker:
+                    yield tracker
+
+        def add_updater(mob, update_function, *args, **kwargs):
+            name = getattr(update_function, "__qualname__", "updater")
+            wrapper = profiler.wrap(update_function, f"updater:{name}")
+            return original_add_updater(mob, wrapper, *args, **kwargs)
+
+        def remove_updater(mob, update_function):
+            for updater in list(mob.updaters):
+                if getattr(updater, "__wrapped__", None) is update_function:
+                    original_remove_updater(mob, updater)
+            return original_remove_updater(mob, update_function)
+
+        self._patch(Scene, "play", functools.wraps(original_play)(play))
+        self._patch(Scene, "wait", functools.wraps(original_wait)(wait))
+        self._patch(VoiceoverScene, "voiceover", voiceover)
+        self._patch(Mobject, "add_updater", add_updater)
+        self._patch(Mobject, "remove_updater", remove_updater)
+        self._patch_method(CairoRenderer, "update_frame", "rasterize")
+        self._patch_method(SceneFileWriter, "write_frame", "write_frame")
+        self._patch_method(SceneFileWriter, "combine_to_movie", "combine")
+        self._patch_method(
+            DirtyRegionMixin, "_draw_dirty_region", "rasterize_dirty_region"
+        )
+        self._patch_method(AnimationBatch, "interpolate", "batched_interpolate")
+        self._patch_method(GlyphAtlas, "_rasterize", "rasterize_glyph")
+        self._patch_method(waveform, "decode_pcm", "decode_audio")
+        self._patch_method(waveform, "compute_envelope", "envelope")
+        self._patch_method(PipelinedRenderer, "get_frame", "copy_frame")
+        self._patch_method(PipelinedFileWriter, "_write_frame_data", "encode")
+        self._patch_method(SVGMobject, "__init__", "svg")
+        self._patch_method(
+            CachedSpeechSynthesizer, "synthesize_from_text", "synthesize"
+        )
+        for name in tex_cache.TEX_MODULES:
+            try:
+                module = importlib.import_module(name)
+            except ImportError:
+                continue
+            if "tex_to_svg_file" in module.__dict__:
+                self._patch_method(module, "tex_to_svg_file", "tex")
+
+        # The animations and mobjects defined by the scene file itself.
+        module = importlib.import_module(scene_module)
+        for cls in vars(module).values():
+            if not (
+                inspect.isclass(cls)
+                and cls.__module__ == module.__name__
+                and issubclass(cls, (Animation, Mobject))
+            ):
+                continue
+            for attr, value in list(vars(cls).items()):
+                if inspect.isfunction(value) and (
+                    attr == "__init__" or not attr.startswith("__")
+                ):
+                    self._patch_method(cls, attr, f"{cls.__name__}.{attr}")
+        return self
+
+    def uninstall(self):
+        for owner, attr, original in reversed(self._patches):
+            setattr(owner, attr, original)
+        self._patches = []
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def get_records(self):
+        """Return one record per stack of sections, slowest first."""
+        with self._lock:
+            records = [
+                {"stack": list(key), **stats} for key, stats in self.stats.items()
+            ]
+        return sorted(records, key=lambda record: record["wall"], reverse=True)
+
+    def write(self, path):
+        """Write ``<path>.json`` and the folded stacks to ``<path>.folded``."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        records = self.get_records()
+        path.with_suffix(".json").write_text(
+            json.dumps({"memory": self.memory, "sections": records}, indent=1)
+        )
+        # Folded stacks weigh each stack by its self time, in microseconds.
+        lines = [
+            f"{';'.join(record['stack'])} {round(record['self'] * 1e6)}"
+            for record in records
+            if record["self"] > 0
+        ]
+        path.with_suffix(".folded").write_text("\n".join(lines) + "\n")
@@ -0,0 +1,249 @@
+"""Render the scenes of ``main_scene.py`` in parallel worker processes.
+
+Each scene, or with ``--split`` each of its ``sections``, is rendered by its
+own worker at the requested quality. The resulting movie files are listed in
+screenplay order in ``segments.txt`` next to them, which is what
+``assemble.py`` concatenates.
+
+With ``--outputs``, each worker also renders the listed extra qualities
+(e.g. ``720p30,480p15``) from the same run of its scene, see
+``multi_output.py``; each gets its own ``segments.txt``.
+
+With ``--shards N``, each scene (or section) is also split at voiceover
+checkpoints into up to N time ranges of similar length, rendered by
+separate workers, see ``checkpoint.py``.
+
+    python render.py [Scene1 Scene2 ...] [-q h] [-j 4] [--split] [--shards N]
+                     [--outputs 720p30,480p15]
+                     [--profile DIR [--profile-memory]]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+SCENES = ["Scene1", "Scene2"]
+QUALITIES = {
+    "l": "low_quality",
+    "m": "medium_quality",
+    "h": "high_quality",
+    "p": "production_quality",
+    "k": "fourk_quality",
+}
+SEGMENT_LIST = "segments.txt"
+
+
+@dataclass
+class Segment:
+    scene: str
+    section: str = None
+    movie_file: str = None
+    # The movie files of the extra outputs, in the order of RENDER_OUTPUTS.
+    output_files: list = field(default_factory=list)
+    # A checkpoint.Shard, to render only part of the scene.
+    shard: object = None
+    elapsed: float = None
+    pid: int = None
+
+    @property
+    def name(self):
+        name = self.scene
+        if self.section is not None:
+            name += f"_{self.section}"
+        if self.shard is not None:
+            name += f"_{self.shard.index:02}"
+        return name
+
+
+def get_scene_class(scene, section=None, shard=None):
+    """Return the scene class, or a subclass that only plays ``section``
+    and, with ``shard``, only the shard's part of it.
+
+    The subclass is named ``<Scene>_<section>[_<shard>]`` so that its
+    partial movie files and output do not collide with other workers
+    rendering the same scene.
+    """
+    import main_scene
+
+    scene_class = getattr(main_scene, scene)
+    name = scene
+    attrs = {}
+    if section is not None:
+        name += f"_{section}"
+        attrs["sections"] = [section]
+    if shard is not None:
+        name += f"_{shard.index:02}"
+        attrs["checkpoint_range"] = (shard.start, shard.end)
+        attrs["checkpoint_expected"] = shard.expected
+    if not attrs:
+        return scene_class
+    return type(name, (scene_class,), attrs)
+
+
+def get_segments(scenes, split=False, shards=1):
+    segments = []
+    for scene in scenes:
+        if split:
+            sections = get_scene_class(scene).sections
+            segments += [Segment(scene, section) for section in sections]
+        else:
+            segments.append(Segment(scene))
+    if shards <= 1:
+        return segments
+    from checkpoint import get_shards
+
+    sharded = []
+    for segment in segments:
+        scene_shards = get_shards(
+            get_scene_class(segment.scene, segment.section), shards
+        )
+        if len(scene_shards) == 1:
+            sharded.append(segment)
+            continue
+        sharded += [
+            Segment(segment.scene, segment.section, shard=shard)
+            for shard in scene_shards
+        ]
+    return sharded
+
+
+def configure(quality):
+    from manim import config
+
+    config.input_file = str(Path(__file__).with_name("main_scene.py"))
+    config.quality = quality
+
+
+def render_segment(segment, quality, profile_dir=None, profile_memory=False):
+    configure(quality)
+    profiler = None
+    if profile_dir is not None:
+        from profiling import Profiler
+
+        profiler = Profiler(memory=profile_memory).install()
+    start = time.perf_counter()
+    scene = get_scene_class(segment.scene, segment.section, segment.shard)()
+    if profiler is None:
+        scene.render()
+    else:
+        with profiler.section(f"scene:{segment.name}"):
+            scene.render()
+        profiler.uninstall()
+        profiler.write(Path(profile_dir) / segment.name)
+    segment.movie_file = str(scene.renderer.file_writer.movie_file_path)
+    segment.output_files = [
+        str(sink.file_writer.movie_file_path)
+        for sink in getattr(scene.renderer, "sinks", ())
+    ]
+    segment.elapsed = time.perf_counter() - start
+    segment.pid = os.getpid()
+    return segment
+
+
+def render(segments, quality, workers=None, profile_dir=None, profile_memory=False):
+    """Render ``segments`` in a process pool and return them in order.
+
+    With ``profile_dir``, each segment's profile is written there as
+    ``<segment>.json`` and ``<segment>.folded``.
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(
+                render_segment, segment, quality, profile_dir, profile_memory
+            )
+            for segment in segments
+        ]
+        segments = [future.result() for future in futures]
+    write_segment_list(segments)
+    return segments
+
+
+def write_segment_list(segments):
+    outputs = zip(
+        *[[segment.movie_file, *segment.output_files] for segment in segments]
+    )
+    for movie_files in outputs:
+        video_dir = Path(movie_files[0]).parent
+        lines = [Path(movie_file).name for movie_file in movie_files]
+        (video_dir / SEGMENT_LIST).write_text("\n".join(lines) + "\n")
+
+
+def print_report(segments, wall_time):
+    for segment in segments:
+        print(f"{segment.name:<16} pid {segment.pid:<7} {segment.elapsed:8.2f}s")
+    total = sum(segment.elapsed for segment in segments)
+    print(
+        f"{len(segments)} segments, {total:.2f}s of render time "
+        f"in {wall_time:.2f}s wall time ({total / wall_time:.1f}x)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenes", nargs="*", default=SCENES)
+    parser.add_argument("-q", "--quality", choices=QUALITIES, default="h")
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    parser.add_argument(
+        "--split", action="store_true", help="render each section separately"
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="split each segment at voiceover checkpoints into up to N parts",
+    )
+    parser.add_argument(
+        "--skip-presynth",
+        action="store_true",
+        help="do not synthesize the narration before starting the workers",
+    )
+    parser.add_argument(
+        "--outputs",
+        default=None,
+        help="extra qualities to render in the same pass, e.g. 720p30,480p15",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        default=None,
+        help="write a profile of every segment to DIR",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="also profile allocations and peak memory (slow)",
+    )
+    args = parser.parse_args()
+
+    if args.outputs is not None:
+        # Read by the workers, which inherit the environment.
+        os.environ["RENDER_OUTPUTS"] = args.outputs
+
+    if not args.skip_presynth:
+        # Fill the voiceover cache first, so that workers rendering sections
+        # of the same scene do not synthesize the same narration twice.
+        from main_scene import SPEECH_SYNTHESIZER
+        from presynth import collect_voiceovers, presynthesize
+
+        presynthesize(collect_voiceovers(scenes=args.scenes), SPEECH_SYNTHESIZER)
+
+    start = time.perf_counter()
+    if args.shards > 1:
+        # The checkpoints are collected by running the scenes here.
+        configure(QUALITIES[args.quality])
+    segments = render(
+        get_segments(args.scenes, args.split, args.shards),
+        QUALITIES[args.quality],
+        args.jobs,
+        args.profile,
+        args.profile_memory,
+    )
+    print_report(segments, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Screenshots of the current frame for "screen within the screen" shots.
+
+``take_snapshot()`` hands the camera's frame buffer itself to the snapshot
+instead of copying it: the camera is given a fresh buffer the next time it
+starts drawing a frame, so the snapshot never changes underneath.
+
+``SnapshotImageMobject`` shows a snapshot without copying it either (copies
+of the mobject share the snapshot), and draws from a pre-downscaled mip
+level sized to its on-screen width, so a thumbnail of a 4K frame is not
+resampled from full resolution on every frame.
+"""
+import numpy as np
+from manim import ImageMobject, config
+
+
+class FrameSnapshot:
+    """An RGBA frame and its lazily built 2x box-filtered mip levels."""
+
+    def __init__(self, pixel_array):
+        self.levels = [pixel_array]
+
+    def __deepcopy__(self, memo):
+        # Snapshots are never written to, so copies can share them.
+        return self
+
+    def get_level(self, pixel_width):
+        """Return the smallest level that is at least ``pixel_width`` wide."""
+        levels = self.levels
+        while levels[-1].shape[1] // 2 >= max(pixel_width, 1):
+            level = levels[-1]
+            h, w = level.shape[0] // 2, level.shape[1] // 2
+            if h == 0:
+                break
+            blocks = level[: 2 * h, : 2 * w].reshape(h, 2, w, 2, level.shape[2])
+            levels.append(blocks.mean(axis=(1, 3)).round().astype(level.dtype))
+        for level in reversed(levels):
+            if level.shape[1] >= pixel_width:
+                return level
+        return levels[0]
+
+
+def _hand_over_buffer(camera):
+    # The camera repaints its frame in place (set_pixel_array copies into the
+    # existing array when the shapes match), so make its next repaint
+    # allocate a new array and leave the current one to the snapshot.
+    if "set_pixel_array" in camera.__dict__:
+        return
+
+    def set_pixel_array(pixel_array, convert_from_floats=False):
+        del camera.set_pixel_array
+        camera.pixel_array = camera.convert_pixel_array(
+            pixel_array, convert_from_floats
+        )
+
+    camera.set_pixel_array = set_pixel_array
+
+
+def take_snapshot(camera):
+    """Return a FrameSnapshot of the camera's current frame, without copying."""
+    _hand_over_buffer(camera)
+    return FrameSnapshot(camera.pixel_array)
+
+
+class SnapshotImageMobject(ImageMobject):
+    def __init__(self, snapshot, camera=None, **kwargs):
+        self.snapshot = snapshot
+        # A closure rather than the camera itself, so that copies of the
+        # mobject do not deep-copy the camera.
+        self.get_frame_width = (
+            (lambda: config.frame_width)
+            if camera is None
+            else (lambda: camera.frame_width)
+        )
+        self._mipmapped = False
+        super().__init__(np.zeros((1, 1, 4), dtype=np.uint8), **kwargs)
+        self.snapshot = snapshot
+        self._mipmapped = True
+
+    @property
+    def pixel_array(self):
+        return self.snapshot.levels[0]
+
+    @pixel_array.setter
+    def pixel_array(self, pixel_array):
+        # While initializing, ImageMobject stores the placeholder array.
+        if not getattr(self, "_mipmapped", True):
+            return
+        self.snapshot = FrameSnapshot(pixel_array)
+
+    def get_pixel_width(self):
+        return self.width * config.pixel_width / self.get_frame_width()
+
+    def get_pixel_array(self):
+        if not self._mipmapped:
+            return self.snapshot.levels[0]
+        return self.snapshot.get_level(int(np.ceil(self.get_pixel_width())))
+
+    def set_opacity(self, alpha):
+        # Write to a private copy rather than to the shared snapshot.
+        self.snapshot = FrameSnapshot(self.snapshot.levels[0].copy())
+        return super().set_opacity(alpha)
+
+    def interpolate_color(self, mobject1, mobject2, alpha):
+        snapshot = getattr(mobject1, "snapshot", None)
+        if snapshot is not None and snapshot is getattr(mobject2, "snapshot", None):
+            self.snapshot = snapshot
+            return self
+        return super().interpolate_color(mobject1, mobject2, alpha)
@@ -0,0 +1,325 @@
+"""Voiceover synthesis helpers shared by the scenes in ``main_scene.py``.
+
+``CachedSpeechSynthesizer`` wraps any manim_speech synthesizer with a
+content-addressed, size-bounded audio store on disk. Hits are answered from
+an in-memory index without touching the wrapped backend (or the network).
+
+``OfflineSpeechSynthesizer`` is a deterministic stand-in backend that writes
+silent audio of a plausible spoken length, for rendering without network
+access.
+
+``get_speech_synthesizer()`` picks a backend from ``SPEECH_BACKENDS`` by name
+(or the ``SPEECH_BACKEND`` environment variable) and wraps it in a
+``LazySpeechSynthesizer``, which only imports and constructs the backend the
+first time something is actually synthesized. Renders served entirely from
+the cache, dry runs and scene listings never load a backend at all.
+"""
+import atexit
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import mutagen
+from manim import config, logger
+from manim_speech.interfaces.base import SpeechSynthesizer
+
+DEFAULT_CACHE_DIR = os.environ.get("SPEECH_CACHE_DIR")
+DEFAULT_CACHE_SIZE = int(os.environ.get("SPEECH_CACHE_MAX_MB", 512)) * 1024 * 1024
+
+# Backend name: (module, class name).
+SPEECH_BACKENDS = {
+    "azure": ("manim_speech.interfaces.azure", "AzureSpeechSynthesizer"),
+    "gtts": ("manim_speech.interfaces.gtts", "GTTSSpeechSynthesizer"),
+    "offline": ("speech", "OfflineSpeechSynthesizer"),
+}
+
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+def get_audio_duration(path):
+    return mutagen.File(path).info.length
+
+
+def get_backend_name(synthesizer):
+    """Return the class name of the backend behind ``synthesizer``."""
+    return getattr(synthesizer, "class_name", type(synthesizer).__name__)
+
+
+def register_backend(name, module, class_name):
+    SPEECH_BACKENDS[name] = (module, class_name)
+
+
+class OfflineSpeechSynthesizer(SpeechSynthesizer):
+    """Writes silence for as long as the text would take to read aloud.
+
+    The length is estimated from the word count and punctuation pauses, so
+    the same text always yields the same audio.
+    """
+
+    def __init__(
+        self, words_per_minute=160, comma_pause=0.25, stop_pause=0.45, **kwargs
+    ):
+        self.words_per_minute = words_per_minute
+        self.comma_pause = comma_pause
+        self.stop_pause = stop_pause
+        super().__init__(**kwargs)
+
+    def estimate_duration(self, text):
+        text = normalize_text(text)
+        duration = len(text.split()) * 60 / self.words_per_minute
+        duration += self.comma_pause * sum(text.count(c) for c in ",;:")
+        duration += self.stop_pause * sum(text.count(c) for c in ".!?")
+        return max(duration, 0.5)
+
+    def _synthesize_text(self, text, path=None, **kwargs):
+        if path is None:
+            digest = hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+            path = f"offline-{digest[:16]}.mp3"
+        audio_path = Path(self.cache_dir) / path
+        if not audio_path.exists():
+            subprocess.run(
+                [
+                    "ffmpeg",
+                    "-y",
+                    "-loglevel",
+                    "error",
+                    "-f",
+                    "lavfi",
+                    "-i",
+                    "anullsrc=r=24000:cl=mono",
+                    "-t",
+                    f"{self.estimate_duration(text):.3f}",
+                    "-c:a",
+                    "libmp3lame",
+                    "-q:a",
+                    "9",
+                    "-fflags",
+                    "+bitexact",
+                    "-map_metadata",
+                    "-1",
+                    str(audio_path),
+                ],
+                check=True,
+            )
+        return {"input_text": text, "original_audio": path}
+
+
+class CachedSpeechSynthesizer(SpeechSynthesizer):
+    """Serves synthesized audio from a persistent on-disk store.
+
+    Entries are keyed on the normalized text, the voice, the style, the
+    global speed and the backend class. The index is kept in memory and
+    written back on misses and at exit; the least recently used entries are
+    evicted once the store grows past ``max_size`` bytes.
+    """
+
+    def __init__(self, synthesizer, cache_dir=None, max_size=DEFAULT_CACHE_SIZE):
+        self.synthesizer = synthesizer
+        self.max_size = max_size
+        if cache_dir is None:
+            cache_dir = DEFAULT_CACHE_DIR or Path(config.media_dir) / "voiceover_cache"
+        super().__init__(global_speed=synthesizer.global_speed, cache_dir=cache_dir)
+        self.index_path = Path(self.cache_dir) / "index.json"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._entries = self._read_index()
+        atexit.register(self.flush)
+
+    def _read_index(self):
+        try:
+            return json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _has_audio(self, entry):
+        return (Path(self.cache_dir) / entry["final_audio"]).exists()
+
+    def get_key(self, text):
+        synthesizer = self.synthesizer
+        fields = {
+            "text": normalize_text(text),
+            "voice": getattr(synthesizer, "voice", None),
+            "style": getattr(synthesizer, "style", None),
+            "global_speed": synthesizer.global_speed,
+            "backend": get_backend_name(synthesizer),
+        }
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    def lookup(self, text):
+        """Return the cached result for ``text``, or None on a miss."""
+        key = self.get_key(text)
+        with self._lock:
+            return self._lookup(key, text)
+
+    def _lookup(self, key, text):
+        # Called with the lock held.
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not self._has_audio(entry):
+            # Evicted or deleted by another render process.
+            del self._entries[key]
+            self._dirty = True
+            return None
+        entry["last_used"] = time.time()
+        self._dirty = True
+        return dict(entry, input_text=text)
+
+    def synthesize_from_text(self, text, path=None, **kwargs):
+        key = self.get_key(text)
+        with self._lock:
+            result = self._lookup(key, text)
+            if result is None:
+                # Another render process may have synthesized it in the meantime.
+                entry = self._read_index().get(key)
+                if entry is not None:
+                    self._entries[key] = entry
+                    result = self._lookup(key, text)
+            if result is not None:
+                self.hits += 1
+                return result
+            self.misses += 1
+        logger.info(f"Synthesizing voiceover with {get_backend_name(self.synthesizer)}")
+        # The wrapped synthesizer is called outside the lock so that several
+        # misses can be synthesized concurrently.
+        synthesized = self.synthesizer.synthesize_from_text(text, **kwargs)
+        source = Path(self.synthesizer.cache_dir) / synthesized["final_audio"]
+        name = key + source.suffix
+        target = Path(self.cache_dir) / name
+        shutil.copyfile(source, target)
+        entry = {
+            "input_text": normalize_text(text),
+            "original_audio": name,
+            "final_audio": name,
+            "duration": get_audio_duration(target),
+            "size": target.stat().st_size,
+            "last_used": time.time(),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._evict(keep=key)
+            self._dirty = True
+        self.flush()
+        return dict(entry, input_text=text)
+
+    def _synthesize_text(self, text, path=None, **kwargs):
+        return self.synthesizer._synthesize_text(text, path, **kwargs)
+
+    def _evict(self, keep):
+        total = sum(entry["size"] for entry in self._entries.values())
+        by_age = sorted(self._entries, key=lambda k: self._entries[k]["last_used"])
+        for key in by_age:
+            if total <= self.max_size:
+                break
+            if key == keep:
+                continue
+            entry = self._entries.pop(key)
+            total -= entry["size"]
+            (Path(self.cache_dir) / entry["final_audio"]).unlink(missing_ok=True)
+            # Decoded audio and envelopes written next to it, see waveform.py.
+            for derived in Path(self.cache_dir).glob(entry["final_audio"] + ".*"):
+                derived.unlink(missing_ok=True)
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            # Merge with entries written by other render processes since the
+            # index was read, keeping whichever was used most recently.
+            entries = self._read_index()
+            for key, entry in self._entries.items():
+                if key not in entries or entries[key]["last_used"] < entry["last_used"]:
+                    entries[key] = entry
+            entries = {
+                key: entry
+                for key, entry in entries.items()
+                if self._has_audio(entry)
+            }
+            tmp_path = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(entries, indent=1))
+            os.replace(tmp_path, self.index_path)
+            self._entries = entries
+            self._dirty = False
+
+
+class LazySpeechSynthesizer:
+    """Stands in for a backend until it is first used.
+
+    The voice, style and global speed that cache keys are made of are
+    answered from the constructor arguments; anything else imports and
+    constructs the backend.
+    """
+
+    def __init__(self, backend, **kwargs):
+        if backend not in SPEECH_BACKENDS:
+            raise ValueError(
+                f"Unknown speech backend {backend!r}, "
+                f"expected one of {', '.join(SPEECH_BACKENDS)}"
+            )
+        self.backend = backend
+        self.module, self.class_name = SPEECH_BACKENDS[backend]
+        self.kwargs = kwargs
+        self._synthesizer = None
+        self._lock = threading.Lock()
+
+    @property
+    def voice(self):
+        return self.kwargs.get("voice")
+
+    @property
+    def style(self):
+        return self.kwargs.get("style")
+
+    @property
+    def global_speed(self):
+        return self.kwargs.get("global_speed", 1.0)
+
+    @property
+    def synthesizer(self):
+        with self._lock:
+            if self._synthesizer is None:
+                module = importlib.import_module(self.module)
+                synthesizer_class = getattr(module, self.class_name)
+                self._synthesizer = synthesizer_class(**self.kwargs)
+        return self._synthesizer
+
+    def __getattr__(self, name):
+        if name.startswith("__") or name in ("kwargs", "_synthesizer", "_lock"):
+            raise AttributeError(name)
+        return getattr(self.synthesizer, name)
+
+
+# Synthesizers by configuration, kept across reloads of the scene module.
+_synthesizers = {}
+
+
+def get_speech_synthesizer(default, global_speed=1.0, cached=True, **options):
+    """Return the synthesizer for the ``SPEECH_BACKEND`` environment variable,
+    or for ``default`` if it is not set.
+
+    ``options`` maps backend names to extra constructor arguments, e.g.
+    ``azure={"voice": "en-US-AriaNeural"}``. Asking again for the same
+    configuration, as a reloaded ``main_scene`` does in the preview process,
+    returns the same synthesizer, with its backend and cache index loaded.
+    """
+    backend = os.environ.get("SPEECH_BACKEND") or default
+    kwargs = options.get(backend, {})
+    key = (backend, global_speed, cached, json.dumps(kwargs, sort_keys=True))
+    if key not in _synthesizers:
+        synthesizer = LazySpeechSynthesizer(
+            backend, global_speed=global_speed, **kwargs
+        )
+        if cached:
+            synthesizer = CachedSpeechSynthesizer(synthesizer)
+        _synthesizers[key] = synthesizer
+    return _synthesizers[key]
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+import assemble
+from render import SEGMENT_LIST
+
+
+@pytest.fixture
+def joined(monkeypatch):
+    """The segment lists joined; joining is ffmpeg's job, only the decision
+    whether to join is tested."""
+    joined = []
+
+    def concat(segments, output):
+        joined.append(segments)
+        output.write_bytes(b"")
+
+    monkeypatch.setattr(assemble, "check_compatible", lambda segments: None)
+    monkeypatch.setattr(assemble, "concat", concat)
+    return joined
+
+
+@pytest.fixture
+def video_dir(tmp_path, joined):
+    for name in ["a.mp4", "b.mp4"]:
+        (tmp_path / name).write_bytes(name.encode())
+    (tmp_path / SEGMENT_LIST).write_text("a.mp4\nb.mp4\n")
+    return tmp_path
+
+
+def count_hashes(monkeypatch):
+    hashed = []
+    hash_file = assemble.hash_file
+
+    def counting_hash_file(path, *args):
+        hashed.append(path.name)
+        return hash_file(path, *args)
+
+    monkeypatch.setattr(assemble, "hash_file", counting_hash_file)
+    return hashed
+
+
+def test_reads_manifest_in_order(video_dir):
+    segments = assemble.read_manifest(video_dir)
+    assert [path.name for path in segments] == ["a.mp4", "b.mp4"]
+
+
+def test_missing_segment(video_dir):
+    (video_dir / "b.mp4").unlink()
+    with pytest.raises(FileNotFoundError, match="b.mp4"):
+        assemble.read_manifest(video_dir)
+
+
+def test_skips_unchanged_segments(video_dir, joined, monkeypatch):
+    output = video_dir / "final.mp4"
+    assert assemble.assemble(video_dir, output)
+    hashed = count_hashes(monkeypatch)
+    assert not assemble.assemble(video_dir, output)
+    # Size and modification time match the record: nothing is hashed again.
+    assert hashed == []
+    assert len(joined) == 1
+
+
+def test_reassembles_changed_segment(video_dir, monkeypatch):
+    output = video_dir / "final.mp4"
+    assemble.assemble(video_dir, output)
+    segment = video_dir / "b.mp4"
+    segment.write_bytes(b"changed")
+    stat = segment.stat()
+    os.utime(segment, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    hashed = count_hashes(monkeypatch)
+    assert assemble.assemble(video_dir, output)
+    assert hashed == ["b.mp4"]
+
+
+def test_touched_but_identical_segment_is_reused(video_dir, monkeypatch):
+    output = video_dir / "final.mp4"
+    assemble.assemble(video_dir, output)
+    segment = video_dir / "a.mp4"
+    stat = segment.stat()
+    os.utime(segment, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    hashed = count_hashes(monkeypatch)
+    assert not assemble.assemble(video_dir, output)
+    assert hashed == ["a.mp4"]
+    # Its new modification time was recorded.
+    assert not assemble.assemble(video_dir, output)
+    assert hashed == ["a.mp4"]
+
+
+def test_missing_output_or_force_reassembles(video_dir, joined):
+    output = video_dir / "final.mp4"
+    assemble.assemble(video_dir, output)
+    assert assemble.assemble(video_dir, output, force=True)
+    output.unlink()
+    assert assemble.assemble(video_dir, output)
+    assert len(joined) == 3
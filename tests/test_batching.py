@@ -0,0 +1,45 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("manim")
+
+from manim import DOWN, FadeOut, LaggedStartMap, Square, VGroup
+
+from batching import AnimationBatch
+
+
+def make_group():
+    # The groups have no points of their own, like a Tex root or a VGroup.
+    return VGroup(
+        *[VGroup(Square(0.2), Square(0.1)).shift(0.5 * i) for i in range(8)]
+    )
+
+
+def play(animation, alpha, batched):
+    animation.begin()
+    if batched:
+        batch = AnimationBatch(animation)
+        batch.install()
+        animation.interpolate(alpha)
+        return batch
+    animation.interpolate(alpha)
+    return None
+
+
+def test_groups_without_points_are_batched():
+    animation = LaggedStartMap(FadeOut, make_group(), shift=DOWN, lag_ratio=0.1)
+    batch = play(animation, 0.5, batched=True)
+    assert "points" in [array.name for array in batch.arrays]
+    assert "points" not in batch.scalars
+
+
+def test_batched_frame_matches_manim():
+    plain = make_group()
+    batched = make_group()
+    for group, is_batched in [(plain, False), (batched, True)]:
+        animation = LaggedStartMap(FadeOut, group, shift=DOWN, lag_ratio=0.1)
+        play(animation, 0.37, is_batched)
+    for expected, found in zip(plain.get_family(), batched.get_family()):
+        np.testing.assert_allclose(found.points, expected.points)
+        np.testing.assert_allclose(found.stroke_rgbas, expected.stroke_rgbas)
+        np.testing.assert_allclose(found.fill_rgbas, expected.fill_rgbas)
@@ -0,0 +1,70 @@
+from dataclasses import asdict
+
+import pytest
+
+pytest.importorskip("manim")
+
+import checkpoint
+from checkpoint import Checkpoint, Shard, get_shards
+
+
+def make_checkpoints(times):
+    return [
+        Checkpoint(index, "sub1", 10 * index, time, index, {})
+        for index, time in enumerate(times)
+    ]
+
+
+@pytest.fixture
+def collected(monkeypatch):
+    """Replace the dry run of a scene with given checkpoint times."""
+
+    def collect(times, duration):
+        checkpoints = make_checkpoints(times)
+        monkeypatch.setattr(
+            checkpoint,
+            "collect_checkpoints",
+            lambda scene_class: (checkpoints, duration),
+        )
+        return checkpoints
+
+    return collect
+
+
+def test_single_shard(collected):
+    collected([0, 10, 20], 30)
+    assert get_shards(object, 1) == [Shard(0)]
+
+
+def test_no_checkpoints(collected):
+    collected([], 30)
+    assert get_shards(object, 4) == [Shard(0)]
+
+
+def test_splits_at_nearest_checkpoints(collected):
+    checkpoints = collected([0, 10, 20, 30, 40], 50)
+    assert get_shards(object, 2) == [
+        Shard(0, None, 2),
+        Shard(1, 2, None, asdict(checkpoints[2])),
+    ]
+
+
+def test_shards_cover_the_scene_in_order(collected):
+    collected([0, 5, 12, 31, 33, 47], 60)
+    shards = get_shards(object, 4)
+    assert shards[0].start is None
+    assert shards[-1].end is None
+    for shard, following in zip(shards, shards[1:]):
+        assert shard.end == following.start
+        assert following.expected["index"] == following.start
+    assert [shard.index for shard in shards] == list(range(len(shards)))
+
+
+def test_more_shards_than_checkpoints(collected):
+    collected([0, 10], 20)
+    # The first checkpoint is the start of the scene, and targets that fall
+    # on the same checkpoint give one boundary.
+    assert [(shard.start, shard.end) for shard in get_shards(object, 8)] == [
+        (None, 1),
+        (1, None),
+    ]
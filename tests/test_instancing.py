@@ -0,0 +1,59 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("manim")
+
+from manim import DL, DOWN, LEFT, RIGHT, UP, Rectangle, Square, VGroup
+
+from instancing import InstancedMobject, instanced
+
+
+def lay_out(share):
+    """The layout of the rectangles in Scene1.sub2, with or without sharing."""
+
+    def wrap(group, **kwargs):
+        return instanced(group, **kwargs) if share else group
+
+    def get_recs():
+        rec = wrap(Rectangle(width=3, height=1))
+        recs = wrap(VGroup(*[rec.copy() for _ in range(3)])).arrange(RIGHT, buff=0)
+        fill_recs = recs.copy()
+        label = Square(0.5).next_to(recs, LEFT, buff=0.3)
+        return wrap(VGroup(label, recs, fill_recs), members=False)
+
+    return (
+        wrap(VGroup(get_recs(), get_recs()), members=False)
+        .arrange(DOWN, aligned_edge=RIGHT)
+        .shift(UP + LEFT * 0.4)
+    )
+
+
+def get_rectangles(group):
+    return [mob for mob in group.get_family() if isinstance(mob, Rectangle)]
+
+
+def test_layout_keeps_instances_shared():
+    rectangles = get_rectangles(lay_out(share=True))
+    assert len(rectangles) == 12
+    assert all(isinstance(mob, InstancedMobject) for mob in rectangles)
+    assert all(mob.is_shared() for mob in rectangles)
+    # They all share a single buffer.
+    assert len({id(mob.__dict__["_shared"]) for mob in rectangles}) == 1
+
+
+def test_layout_matches_plain_mobjects():
+    shared = lay_out(share=True)
+    plain = lay_out(share=False)
+    np.testing.assert_allclose(shared.get_corner(DL), plain.get_corner(DL))
+    for found, expected in zip(get_rectangles(shared), get_rectangles(plain)):
+        np.testing.assert_allclose(found.points, expected.points, atol=1e-12)
+
+
+def test_reading_points_gives_a_private_writable_copy():
+    rec = instanced(Rectangle())
+    copy = rec.copy().shift(RIGHT)
+    points = copy.points
+    points[0] += UP
+    assert not copy.is_shared()
+    assert rec.is_shared()
+    np.testing.assert_allclose(copy.points[0], rec.points[0] + RIGHT + UP)
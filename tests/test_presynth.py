@@ -0,0 +1,66 @@
+import textwrap
+
+import pytest
+
+pytest.importorskip("manim_speech")
+pytest.importorskip("mutagen")
+
+from presynth import collect_voiceovers
+
+SOURCE = '''
+class Scene1(ProductionScene):
+    sections = ["sub1", "sub2"]
+
+    def sub2(self):
+        with self.voiceover(text="Second section") as tracker:
+            pass
+
+    def sub1(self):
+        with self.voiceover("First") as tracker:
+            with self.voiceover(text="""
+Nested,   on
+several lines
+"""):
+                pass
+        with self.voiceover(text=f"Not literal {tracker}"):
+            pass
+        with other.voiceover(text="Not the scene"):
+            pass
+
+
+class Scene2(ProductionScene):
+    def construct(self):
+        self.intro()
+
+    def helper(self):
+        self.voiceover(text="Helper")
+
+    def intro(self):
+        self.voiceover(text="Intro")
+'''
+
+
+@pytest.fixture
+def scene_file(tmp_path):
+    path = tmp_path / "scenes.py"
+    path.write_text(textwrap.dedent(SOURCE))
+    return path
+
+
+def test_collects_literal_texts_in_play_order(scene_file):
+    blocks = collect_voiceovers(scene_file)
+    assert [(block.scene, block.method) for block in blocks] == [
+        ("Scene1", "sub1"),
+        ("Scene1", "sub1"),
+        ("Scene1", "sub2"),
+        ("Scene2", "intro"),
+        ("Scene2", "helper"),
+    ]
+    assert blocks[0].text == "First"
+    assert " ".join(blocks[1].text.split()) == "Nested, on several lines"
+    assert blocks[1].lineno > blocks[0].lineno
+
+
+def test_filters_scenes(scene_file):
+    blocks = collect_voiceovers(scene_file, scenes=["Scene2"])
+    assert [block.text for block in blocks] == ["Intro", "Helper"]
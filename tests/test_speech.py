@@ -0,0 +1,101 @@
+import itertools
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("manim_speech")
+pytest.importorskip("mutagen")
+
+import speech
+from speech import CachedSpeechSynthesizer, normalize_text
+
+
+class FakeBackend:
+    """Writes ``size`` bytes of audio per text into its own directory."""
+
+    global_speed = 1.0
+    voice = "voice"
+    style = None
+
+    def __init__(self, cache_dir, size=10):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.calls = []
+
+    def synthesize_from_text(self, text, **kwargs):
+        self.calls.append(text)
+        name = f"{len(self.calls)}.mp3"
+        (Path(self.cache_dir) / name).write_bytes(b"x" * self.size)
+        return {"final_audio": name}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    backend_dir = tmp_path / "backend"
+    backend_dir.mkdir()
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    clock = itertools.count()
+    monkeypatch.setattr(speech, "time", SimpleNamespace(time=lambda: next(clock)))
+    monkeypatch.setattr(speech, "get_audio_duration", lambda path: 1.0)
+    return CachedSpeechSynthesizer(
+        FakeBackend(backend_dir), cache_dir=cache_dir, max_size=25
+    )
+
+
+def test_normalize_text():
+    assert normalize_text("  Hello,\n\tworld  again ") == "Hello, world again"
+
+
+def test_key_ignores_whitespace(cache):
+    assert cache.get_key("Hello world") == cache.get_key("\n  Hello   world\n")
+    assert cache.get_key("Hello world") != cache.get_key("Hello, world")
+
+
+def test_key_depends_on_voice(cache):
+    key = cache.get_key("Hello")
+    cache.synthesizer.voice = "other"
+    assert cache.get_key("Hello") != key
+
+
+def test_hit_does_not_synthesize(cache):
+    first = cache.synthesize_from_text("Hello world")
+    second = cache.synthesize_from_text("Hello   world")
+    assert cache.synthesizer.calls == ["Hello world"]
+    assert first["final_audio"] == second["final_audio"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evicts_least_recently_used(cache):
+    cache_dir = Path(cache.cache_dir)
+    first = cache.synthesize_from_text("first")["final_audio"]
+    second = cache.synthesize_from_text("second")["final_audio"]
+    # Derived files, like the waveform envelope, go with their audio.
+    (cache_dir / f"{second}.env100.npy").write_bytes(b"")
+    cache.lookup("first")
+    third = cache.synthesize_from_text("third")["final_audio"]
+
+    assert cache.lookup("second") is None
+    assert not (cache_dir / second).exists()
+    assert not (cache_dir / f"{second}.env100.npy").exists()
+    for name in [first, third]:
+        assert (cache_dir / name).exists()
+
+
+def test_keeps_new_entry_over_budget(cache):
+    cache.max_size = 5
+    name = cache.synthesize_from_text("long")["final_audio"]
+    assert (Path(cache.cache_dir) / name).exists()
+    assert cache.lookup("long") is not None
+
+
+def test_missing_audio_is_a_miss(cache):
+    name = cache.synthesize_from_text("Hello")["final_audio"]
+    # Evicted by another render process.
+    (Path(cache.cache_dir) / name).unlink()
+    assert cache.lookup("Hello") is None
+    cache.synthesize_from_text("Hello")
+    assert cache.synthesizer.calls == ["Hello", "Hello"]
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert (Path(cache.cache_dir) / name).exists()
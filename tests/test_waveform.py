@@ -0,0 +1,83 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("manim")
+
+import waveform
+from waveform import ENVELOPE_RATE, SAMPLE_RATE, SoundTrack, compute_envelope
+
+HOP = SAMPLE_RATE // ENVELOPE_RATE
+
+
+def sine(amplitude, seconds, frequency=500):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.int16)
+
+
+def test_rms_of_sine_sections():
+    samples = np.concatenate([sine(4000, 0.5), sine(8000, 0.5)])
+    envelope = compute_envelope(samples)
+    assert len(envelope) == ENVELOPE_RATE
+    # Whole periods per window: RMS is amplitude / sqrt(2) in both halves,
+    # normalized to the louder one.
+    np.testing.assert_allclose(envelope[: ENVELOPE_RATE // 2], 0.5, atol=0.01)
+    np.testing.assert_allclose(envelope[ENVELOPE_RATE // 2 :], 1, atol=0.01)
+
+
+def test_rms_against_direct_computation():
+    samples = np.random.default_rng(0).integers(-3000, 3000, 10 * HOP, np.int16)
+    windows = samples.astype(float).reshape(-1, HOP)
+    expected = np.sqrt(np.mean(windows**2, axis=1))
+    np.testing.assert_allclose(
+        compute_envelope(samples), expected / expected.max(), rtol=1e-5
+    )
+
+
+def test_partial_last_window():
+    samples = np.full(3 * HOP + HOP // 2, 1000, np.int16)
+    envelope = compute_envelope(samples)
+    assert len(envelope) == 4
+    np.testing.assert_allclose(envelope[:3], 1)
+    # The missing half of the window counts as silence.
+    assert envelope[3] == pytest.approx(np.sqrt(0.5), rel=1e-3)
+
+
+def test_blocks_do_not_change_the_result(monkeypatch):
+    samples = sine(5000, 1.3) + sine(2000, 1.3, frequency=57)
+    whole = compute_envelope(samples)
+    monkeypatch.setattr(waveform, "BLOCK_WINDOWS", 7)
+    np.testing.assert_array_equal(compute_envelope(samples), whole)
+
+
+def test_silence():
+    envelope = compute_envelope(np.zeros(5 * HOP, np.int16))
+    np.testing.assert_array_equal(envelope, 0)
+
+
+def test_empty():
+    assert len(compute_envelope(np.zeros(0, np.int16))) == 0
+
+
+def test_sound_track_samples_by_scene_time(monkeypatch):
+    envelopes = {
+        "a.mp3": np.linspace(0, 1, 2 * ENVELOPE_RATE, dtype=np.float32),
+        "b.mp3": np.full(ENVELOPE_RATE, 0.25, np.float32),
+        "silent.mp3": np.zeros(ENVELOPE_RATE, np.float32),
+    }
+    monkeypatch.setattr(waveform, "get_envelope", lambda path, rate: envelopes[path])
+    waveform._is_audible.cache_clear()
+    track = SoundTrack()
+    assert track.is_silent()
+    track.add("silent.mp3", 0)
+    assert track.is_silent()
+    track.add("a.mp3", 10)
+    track.add("b.mp3", 11)
+    assert not track.is_silent()
+
+    times = np.array([5, 10, 10.5, 11.5, 12.5, 20])
+    out = track.sample(times, np.empty(len(times)))
+    a = envelopes["a.mp3"]
+    np.testing.assert_allclose(
+        out,
+        [0, a[0], a[ENVELOPE_RATE // 2], max(a[3 * ENVELOPE_RATE // 2], 0.25), 0, 0],
+    )
@@ -0,0 +1,291 @@
+"""Persistent Tex/MathTex SVG cache with batched LaTeX compilation.
+
+``install()`` routes manim's ``tex_to_svg_file`` through a content-addressed
+SVG store shared by every render process. Entries are keyed on the complete
+LaTeX document, the compiler and the output format, and are written with an
+atomic rename, so concurrent workers can read and fill the store safely.
+
+``prepare_tex()`` compiles every missing expression of a scene in a single
+LaTeX job, with each expression on its own page of one ``standalone``
+document, and splits the pages into per-expression SVGs with one dvisvgm
+run. The expressions are collected statically from the ``Tex``/``MathTex``
+calls of the scene class by ``collect_tex()``. Anything the batch misses is
+still compiled on first use, one expression at a time, like before.
+"""
+import ast
+import hashlib
+import importlib
+import inspect
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+from pathlib import Path
+
+from manim import MathTex, SingleStringMathTex, Tex, config, logger
+from manim.utils import tex_file_writing
+
+TEX_CLASSES = {"Tex": Tex, "MathTex": MathTex}
+BATCH_ENVIRONMENT = "manimbatchpage"
+# Modules that hold a reference to tex_to_svg_file, depending on the version.
+TEX_MODULES = [
+    "manim.utils.tex_file_writing",
+    "manim.mobject.svg.tex_mobject",
+    "manim.mobject.text.tex_mobject",
+]
+
+_original_tex_to_svg_file = tex_file_writing.tex_to_svg_file
+
+
+def get_cache_dir():
+    cache_dir = os.environ.get("TEX_CACHE_DIR")
+    if cache_dir is None:
+        cache_dir = Path(config.media_dir) / "tex_cache"
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def get_tex_code(expression, environment=None, tex_template=None):
+    if tex_template is None:
+        tex_template = config["tex_template"]
+    if environment is not None:
+        return tex_template.get_texcode_for_expression_in_env(expression, environment)
+    return tex_template.get_texcode_for_expression(expression)
+
+
+def get_cache_path(expression, environment=None, tex_template=None):
+    if tex_template is None:
+        tex_template = config["tex_template"]
+    key = "\n".join(
+        [
+            get_tex_code(expression, environment, tex_template),
+            tex_template.tex_compiler,
+            tex_template.output_format,
+        ]
+    )
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return get_cache_dir() / f"{digest[:32]}.svg"
+
+
+def _install_file(source, target):
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
+
+
+def cached_tex_to_svg_file(expression, environment=None, tex_template=None):
+    cache_path = get_cache_path(expression, environment, tex_template)
+    if cache_path.exists():
+        return str(cache_path)
+    svg_file = _original_tex_to_svg_file(expression, environment, tex_template)
+    _install_file(svg_file, cache_path)
+    return str(cache_path)
+
+
+def install():
+    """Make every Tex and MathTex go through the shared SVG cache."""
+    for name in TEX_MODULES:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+        if hasattr(module, "tex_to_svg_file"):
+            module.tex_to_svg_file = cached_tex_to_svg_file
+
+
+def _get_modified_expression(tex_string):
+    # The same cleanup SingleStringMathTex applies before compiling. The
+    # methods involved do not read any instance state.
+    mob = SingleStringMathTex.__new__(SingleStringMathTex)
+    try:
+        return mob.get_modified_expression(tex_string)
+    except AttributeError:
+        return tex_string.strip()
+
+
+def _get_literal_strings(node, loop_values):
+    if isinstance(node, ast.Name) and node.id in loop_values:
+        return loop_values[node.id]
+    try:
+        value = ast.literal_eval(node)
+    except ValueError:
+        return None
+    return [value] if isinstance(value, str) else None
+
+
+def _get_loop_values(tree):
+    """Map comprehension and loop variables over literal sequences to their
+    values, e.g. ``t`` in ``[Tex(t) for t in ["0:00", "3:00"]]``."""
+    loop_values = {}
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.comprehension, ast.For)) and isinstance(
+            node.target, ast.Name
+        ):
+            try:
+                values = ast.literal_eval(node.iter)
+            except ValueError:
+                continue
+            if isinstance(values, (list, tuple)) and all(
+                isinstance(value, str) for value in values
+            ):
+                loop_values[node.target.id] = list(values)
+    return loop_values
+
+
+def collect_tex(scene_class):
+    """Return the (expression, environment) pairs the scene will compile.
+
+    Only calls whose strings are literals, or loop variables over literal
+    lists, are found; the defaults of ``Tex`` and ``MathTex`` are assumed
+    unless ``tex_environment`` or ``arg_separator`` are given as literals.
+    """
+    trees = []
+    for cls in scene_class.__mro__:
+        try:
+            trees.append(ast.parse(textwrap.dedent(inspect.getsource(cls))))
+        except (OSError, TypeError):
+            # Classes created at runtime, like render.py's section
+            # subclasses, have no source of their own.
+            continue
+    nodes = [node for tree in trees for node in ast.walk(tree)]
+    loop_values = {}
+    for tree in trees:
+        loop_values.update(_get_loop_values(tree))
+    expressions = []
+    for node in nodes:
+        if not (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in TEX_CLASSES
+        ):
+            continue
+        args = [_get_literal_strings(arg, loop_values) for arg in node.args]
+        if not args or any(values is None for values in args):
+            continue
+        parameters = inspect.signature(TEX_CLASSES[node.func.id].__init__).parameters
+        options = {"tex_environment": None, "arg_separator": ""}
+        for name in options:
+            if name in parameters:
+                options[name] = parameters[name].default
+        try:
+            for keyword in node.keywords:
+                if keyword.arg in options:
+                    options[keyword.arg] = ast.literal_eval(keyword.value)
+        except ValueError:
+            continue
+        environment = options["tex_environment"]
+        if len(args) == 1:
+            # One literal per call, or one call per value of a loop variable.
+            combinations = [[value] for value in args[0]]
+        elif all(len(values) == 1 for values in args):
+            combinations = [[values[0] for values in args]]
+        else:
+            continue
+        for strings in combinations:
+            expressions.append(
+                (options["arg_separator"].join(strings), environment)
+            )
+            if len(strings) > 1:
+                # MathTex compiles every part on its own to split it up.
+                expressions += [(string, environment) for string in strings]
+    unique = dict.fromkeys(
+        (_get_modified_expression(expression), environment)
+        for expression, environment in expressions
+    )
+    return list(unique)
+
+
+def _split_document(tex_code):
+    head, rest = tex_code.split("\\begin{document}", 1)
+    body = rest.rsplit("\\end{document}", 1)[0]
+    return head, body
+
+
+def _compile_batch(items, tex_template):
+    """Compile ``items`` as pages of one document and install their SVGs.
+
+    Returns False, without installing anything, if the document did not
+    produce exactly one page per item.
+    """
+    head = None
+    bodies = []
+    for expression, environment in items:
+        item_head, body = _split_document(
+            get_tex_code(expression, environment, tex_template)
+        )
+        if head is not None and item_head != head:
+            return False
+        head = item_head
+        bodies.append(body)
+    documentclass = tex_template.documentclass
+    if "{standalone}" not in documentclass or documentclass not in head:
+        return False
+    if "]{standalone}" in documentclass:
+        batch_class = documentclass.replace(
+            "]{standalone}", f",multi={BATCH_ENVIRONMENT}]{{standalone}}"
+        )
+    else:
+        batch_class = documentclass.replace(
+            "{standalone}", f"[multi={BATCH_ENVIRONMENT}]{{standalone}}"
+        )
+    pages = "\n".join(
+        f"\\begin{{{BATCH_ENVIRONMENT}}}{body}\\end{{{BATCH_ENVIRONMENT}}}"
+        for body in bodies
+    )
+    document = (
+        head.replace(documentclass, batch_class)
+        + f"\\newenvironment{{{BATCH_ENVIRONMENT}}}{{}}{{}}\n"
+        + "\\begin{document}\n"
+        + pages
+        + "\n\\end{document}\n"
+    )
+
+    extension = tex_template.output_format
+    with tempfile.TemporaryDirectory(dir=get_cache_dir()) as tmp_dir:
+        tex_file = Path(tmp_dir) / "batch.tex"
+        tex_file.write_text(document, encoding="utf-8")
+        command = tex_file_writing.tex_compilation_command(
+            tex_template.tex_compiler, extension, tex_file.as_posix(), tmp_dir
+        )
+        subprocess.run(command, shell=True, capture_output=True)
+        dvi_file = tex_file.with_suffix(extension)
+        if not dvi_file.exists():
+            return False
+        subprocess.run(
+            [
+                "dvisvgm",
+                *(["--pdf"] if extension == ".pdf" else []),
+                "--page=1-",
+                "--no-fonts",
+                "--verbosity=0",
+                f"--output={tmp_dir}/page-%p.svg",
+                str(dvi_file),
+            ],
+            capture_output=True,
+        )
+        svg_files = [Path(tmp_dir) / f"page-{i + 1}.svg" for i in range(len(items))]
+        extra_page = Path(tmp_dir) / f"page-{len(items) + 1}.svg"
+        if not all(path.exists() for path in svg_files) or extra_page.exists():
+            return False
+        for (expression, environment), svg_file in zip(items, svg_files):
+            cache_path = get_cache_path(expression, environment, tex_template)
+            _install_file(svg_file, cache_path)
+    return True
+
+
+def prepare_tex(expressions, tex_template=None):
+    """Compile the expressions that are not cached yet in one LaTeX job."""
+    if tex_template is None:
+        tex_template = config["tex_template"]
+    missing = [
+        (expression, environment)
+        for expression, environment in expressions
+        if not get_cache_path(expression, environment, tex_template).exists()
+    ]
+    if len(missing) < 2:
+        return
+    logger.info(f"Compiling {len(missing)} Tex expressions in one batch")
+    if not _compile_batch(missing, tex_template):
+        logger.info("Batched Tex compilation failed, compiling on first use")
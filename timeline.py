@@ -0,0 +1,266 @@
+"""Check the timing of the scenes without rendering them.
+
+The scenes are run with every animation skipped: ``construct()`` executes,
+each ``play`` and ``wait`` advances the scene clock by its run time and the
+voiceover blocks get their real narration durations from the speech cache,
+but nothing is interpolated frame by frame, drawn or encoded.
+
+The report lists every voiceover block with the time its animations take
+against the length of its narration, and flags
+
+- negative run times, e.g. a ``self.wait(tk.duration - 1.2 - 1.5)`` whose
+  narration got shorter than the hand-tuned offsets,
+- overruns, where the animations of a block outlast its narration,
+- with ``--max-slack``, slack, where the narration runs on over a still
+  frame for longer than that many seconds. Some slack is often intended,
+  so it is only checked when asked for.
+
+    python timeline.py [Scene1 Scene2 ...] [--json FILE] [--max-slack SECONDS]
+
+The exit status is 1 if anything was flagged.
+"""
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+from manim import DEFAULT_WAIT_TIME, config
+
+from render import SCENES, configure, get_scene_class
+
+# Frames in these modules are skipped when looking for the scene code that
+# made a call.
+INTERNAL_MODULES = {
+    "timeline",
+    "profiling",
+    "block_cache",
+    "checkpoint",
+    "contextlib",
+    "manim",
+    "manim_speech",
+}
+TOLERANCE = 1e-3
+
+
+@dataclass
+class TimelineEvent:
+    kind: str
+    method: str
+    lineno: int
+    start: float
+    requested: float = None
+    elapsed: float = None
+    description: str = ""
+
+
+@dataclass
+class TimelineBlock:
+    method: str
+    lineno: int
+    text: str
+    start: float
+    duration: float
+    content: float = None
+    end: float = None
+    events: list = field(default_factory=list)
+
+    @property
+    def slack(self):
+        return self.duration - self.content
+
+
+@dataclass
+class Timeline:
+    scene: str
+    blocks: list = field(default_factory=list)
+    events: list = field(default_factory=list)
+    end: float = None
+    error: str = None
+
+    def get_problems(self, max_slack=None):
+        """Return (time, lineno, message) tuples for everything flagged."""
+        problems = []
+        for event in self.events:
+            if event.requested is not None and event.requested < 0:
+                problems.append(
+                    (
+                        event.start,
+                        event.lineno,
+                        f"negative {event.kind} of {event.requested:.2f}s",
+                    )
+                )
+        for block in self.blocks:
+            if block.content is None:
+                continue
+            if block.slack < -TOLERANCE:
+                problems.append(
+                    (
+                        block.start,
+                        block.lineno,
+                        f"animations overrun the narration by {-block.slack:.2f}s",
+                    )
+                )
+            elif max_slack is not None and block.slack > max_slack:
+                problems.append(
+                    (
+                        block.start,
+                        block.lineno,
+                        f"narration continues {block.slack:.2f}s "
+                        "after the animations",
+                    )
+                )
+        if self.error is not None:
+            problems.append((self.end, None, self.error))
+        return sorted(problems, key=lambda problem: problem[0] or 0)
+
+
+def get_caller_frame():
+    """Return the frame of the scene code that led to the call."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "").split(".")[0]
+        if module not in INTERNAL_MODULES:
+            return frame
+        frame = frame.f_back
+    return None
+
+
+def get_caller():
+    """Return the method and line of the scene code that led to the call."""
+    frame = get_caller_frame()
+    if frame is None:
+        return None, None
+    return frame.f_code.co_name, frame.f_lineno
+
+
+def describe_animation(animation):
+    name = type(animation).__name__
+    if name == "_AnimationBuilder":
+        return ".animate"
+    return name
+
+
+class TimelineMixin:
+    """Mixin for scenes that records the timeline while ``timeline`` is set.
+
+    Nothing is recorded, and nothing changes, for normal renders.
+    """
+
+    timeline = None
+    _timeline_depth = 0
+    _timeline_block = None
+
+    @contextmanager
+    def _record(self, kind, requested, description):
+        if self.timeline is None or self._timeline_depth:
+            # Not recording, or a play() made by wait() itself.
+            yield
+            return
+        method, lineno = get_caller()
+        event = TimelineEvent(
+            kind, method, lineno, self.renderer.time, requested, None, description
+        )
+        self.timeline.events.append(event)
+        if self._timeline_block is not None:
+            self._timeline_block.events.append(event)
+        self._timeline_depth += 1
+        try:
+            yield
+        finally:
+            self._timeline_depth -= 1
+            event.elapsed = self.renderer.time - event.start
+
+    def play(self, *args, **kwargs):
+        with self._record(
+            "play",
+            kwargs.get("run_time"),
+            ", ".join(describe_animation(animation) for animation in args),
+        ):
+            return super().play(*args, **kwargs)
+
+    def wait(self, duration=DEFAULT_WAIT_TIME, *args, **kwargs):
+        with self._record("wait", duration, ""):
+            return super().wait(duration, *args, **kwargs)
+
+    def voiceover(self, text, **kwargs):
+        if self.timeline is None:
+            return super().voiceover(text, **kwargs)
+        return self._record_voiceover(text, get_caller(), **kwargs)
+
+    @contextmanager
+    def _record_voiceover(self, text, caller, **kwargs):
+        with super().voiceover(text=text, **kwargs) as tracker:
+            block = TimelineBlock(
+                *caller, " ".join(text.split()), self.renderer.time, tracker.duration
+            )
+            self.timeline.blocks.append(block)
+            self._timeline_block = block
+            try:
+                yield tracker
+            finally:
+                self._timeline_block = None
+            block.content = self.renderer.time - block.start
+        block.end = self.renderer.time
+
+
+def run_timeline(scene):
+    """Run ``scene`` without rendering and return its Timeline."""
+    config.dry_run = True
+    config.disable_caching = True
+    instance = get_scene_class(scene)(skip_animations=True)
+    # Animations are skipped, so the frame saved under the moving mobjects
+    # of every play() would never be used.
+    instance.renderer.save_static_frame_data = lambda scene, mobjects: None
+    timeline = instance.timeline = Timeline(scene)
+    try:
+        instance.render()
+    except Exception as e:
+        timeline.error = f"{type(e).__name__}: {e}"
+    timeline.end = instance.renderer.time
+    return timeline
+
+
+def _format_time(seconds):
+    return f"{int(seconds // 60)}:{seconds % 60:05.2f}"
+
+
+def print_report(timeline, max_slack=None):
+    print(f"{timeline.scene}  ({_format_time(timeline.end or 0)})")
+    for block in timeline.blocks:
+        text = block.text if len(block.text) <= 48 else block.text[:45] + "..."
+        content = "-" if block.content is None else f"{block.content:6.2f}s"
+        print(
+            f"  {_format_time(block.start):>8}  {block.method}:{block.lineno:<5}"
+            f" narration {block.duration:6.2f}s  animations {content}  {text}"
+        )
+    for time, lineno, message in timeline.get_problems(max_slack):
+        location = "" if lineno is None else f"line {lineno}: "
+        print(f"  !! {_format_time(time or 0):>8}  {location}{message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenes", nargs="*", default=SCENES)
+    parser.add_argument("--json", default=None, help="also write the timelines here")
+    parser.add_argument(
+        "--max-slack",
+        type=float,
+        default=None,
+        help="flag blocks whose narration outlasts their animations by more",
+    )
+    args = parser.parse_args()
+
+    configure("low_quality")
+    timelines = [run_timeline(scene) for scene in args.scenes]
+    for timeline in timelines:
+        print_report(timeline, args.max_slack)
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump([asdict(timeline) for timeline in timelines], f, indent=1)
+    if any(timeline.get_problems(args.max_slack) for timeline in timelines):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
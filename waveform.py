@@ -0,0 +1,157 @@
+"""Loudness envelopes of the narration, for drawing its live waveform.
+
+``get_envelope(path)`` decodes an audio file once with ffmpeg into raw
+16-bit mono PCM next to it (``<audio>.pcm``), reads that through a memory
+map and reduces it, a block of windows at a time, to the RMS loudness of
+every ``1 / ENVELOPE_RATE`` seconds, normalized to the loudest window. The
+envelope is saved next to the audio (``<audio>.env<rate>.npy``) and loaded
+memory-mapped, so rendering never decodes or transforms audio, and neither
+the decoded track nor its envelope is ever held in memory as a whole. The
+PCM, ten times the size of the audio, is deleted once the envelope is
+written; the envelope itself is a few hundred bytes per second.
+
+``SoundTrack`` records the sounds a scene adds and their start times, and
+samples their combined envelope at any scene times by indexing into it;
+``AudioWave`` in ``main_scene.py`` draws from it.
+"""
+import functools
+import os
+import subprocess
+from pathlib import Path
+
+import numpy as np
+from manim import logger
+
+SAMPLE_RATE = 24000
+ENVELOPE_RATE = 100
+# Windows reduced per vectorized step; bounds the memory of the pass.
+BLOCK_WINDOWS = 4096
+
+
+def _is_stale(path, source):
+    return not path.exists() or path.stat().st_mtime < source.stat().st_mtime
+
+
+def decode_pcm(path):
+    """Return the samples of ``path`` as a read-only memory-mapped array."""
+    path = Path(path)
+    pcm_path = path.with_name(f"{path.name}.pcm")
+    if _is_stale(pcm_path, path):
+        tmp_path = pcm_path.with_name(f"{pcm_path.name}.{os.getpid()}.tmp")
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-y",
+                "-loglevel",
+                "error",
+                "-i",
+                str(path),
+                "-f",
+                "s16le",
+                "-acodec",
+                "pcm_s16le",
+                "-ac",
+                "1",
+                "-ar",
+                str(SAMPLE_RATE),
+                str(tmp_path),
+            ],
+            check=True,
+        )
+        os.replace(tmp_path, pcm_path)
+    if pcm_path.stat().st_size == 0:
+        return np.zeros(0, dtype=np.int16)
+    return np.memmap(pcm_path, dtype=np.int16, mode="r")
+
+
+def compute_envelope(samples, rate=ENVELOPE_RATE):
+    """Return the normalized RMS loudness of ``samples`` per window."""
+    hop = SAMPLE_RATE // rate
+    envelope = np.zeros(-(-len(samples) // hop), dtype=np.float32)
+    block = BLOCK_WINDOWS * hop
+    for start in range(0, len(samples), block):
+        chunk = np.asarray(samples[start : start + block], dtype=np.float32)
+        if len(chunk) % hop:
+            chunk = np.concatenate([chunk, np.zeros(-len(chunk) % hop, np.float32)])
+        windows = chunk.reshape(-1, hop)
+        first = start // hop
+        np.sqrt(
+            np.mean(np.square(windows), axis=1),
+            out=envelope[first : first + len(windows)],
+        )
+    peak = envelope.max(initial=0)
+    if peak > 0:
+        envelope /= peak
+    return envelope
+
+
+@functools.lru_cache(maxsize=None)
+def get_envelope(path, rate=ENVELOPE_RATE):
+    path = Path(path)
+    envelope_path = path.with_name(f"{path.name}.env{rate}.npy")
+    if _is_stale(envelope_path, path):
+        samples = decode_pcm(path)
+        envelope = compute_envelope(samples, rate)
+        tmp_path = envelope_path.with_name(f"{path.name}.{os.getpid()}.tmp.npy")
+        np.save(tmp_path, envelope)
+        os.replace(tmp_path, envelope_path)
+        # Closes the memory map before its file goes.
+        del samples
+        path.with_name(f"{path.name}.pcm").unlink(missing_ok=True)
+    return np.load(envelope_path, mmap_mode="r")
+
+
+@functools.lru_cache(maxsize=None)
+def _is_audible(path, rate=ENVELOPE_RATE):
+    return bool(get_envelope(path, rate).any())
+
+
+class SoundTrack:
+    """The sounds added to a scene, by start time."""
+
+    def __init__(self, rate=ENVELOPE_RATE):
+        self.rate = rate
+        self.sounds = []
+
+    def __deepcopy__(self, memo):
+        # Shared by every copy of the mobjects drawing from it.
+        return self
+
+    def add(self, path, start):
+        self.sounds.append((str(path), start))
+
+    def _get_envelope(self, sound):
+        try:
+            return get_envelope(sound[0], self.rate)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Cannot read the waveform of {sound[0]}: {e}")
+            self.sounds.remove(sound)
+            return None
+
+    def is_silent(self):
+        """Whether all sounds so far are silent, like offline narration."""
+        for sound in list(self.sounds):
+            if self._get_envelope(sound) is not None and _is_audible(
+                sound[0], self.rate
+            ):
+                return False
+        return True
+
+    def sample(self, times, out):
+        """Write the loudness at ``times`` (scene seconds) into ``out``."""
+        out[...] = 0
+        first, last = times.min(), times.max()
+        for sound in list(self.sounds):
+            start = sound[1]
+            if start > last:
+                continue
+            envelope = self._get_envelope(sound)
+            if envelope is None or not len(envelope):
+                continue
+            if start + len(envelope) / self.rate < first:
+                continue
+            index = ((times - start) * self.rate).astype(int)
+            valid = (index >= 0) & (index < len(envelope))
+            values = envelope[np.clip(index, 0, len(envelope) - 1)]
+            np.maximum(out, np.where(valid, values, 0), out=out)
+        return out